@@ -0,0 +1,70 @@
+# benchmarks/bench_crawl.py
+#
+# Offline, repeatable crawler benchmark against a recorded archive.
+#
+#   1. record once (live):   archive: {mode: record} in run_config.yaml, mode: crawl
+#                            -> storage/_archives/<job>.har.zip
+#   2. benchmark (offline):  python -m benchmarks.bench_crawl storage/_archives/<job>.har.zip --tabs hot,news
+#
+# Every run replays the same archive into a throwaway job dir, so numbers are
+# comparable across crawler changes.
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from config import TABS, DEFAULT_SCROLL_ROUNDS, DEFAULT_FETCH_CONCURRENCY
+from crawler.browser_crawler import XueqiuBrowserCrawler
+from utils import read_json_list
+
+
+def _tab_keys(spec: str):
+    if spec == "all":
+        return list(TABS.values())
+    wanted = [k.strip() for k in spec.split(",")]
+    return [(k, lbl) for (k, lbl) in TABS.values() if k in wanted]
+
+
+async def _bench(archive: Path, tab_keys, scroll: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = Path(tmp) / "bench_job" / "raw"
+        crawler = XueqiuBrowserCrawler(
+            raw_dir, scroll_rounds=scroll, concurrency=concurrency,
+            archive_mode="replay", archive_path=archive,
+            # the limiter would dominate an offline run
+            rate_limit={"rate": 1000.0, "burst": 1000},
+        )
+        t0 = time.perf_counter()
+        await crawler.crawl(tab_keys)
+        wall = time.perf_counter() - t0
+
+        pages = sum(crawler.limiter.requests.values())
+        per_tab = {k: len(read_json_list(raw_dir / f"posts_{k}.json")) for k, _ in tab_keys}
+    return wall, pages, per_tab, crawler.tab_stats
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("archive", type=Path, help="HAR zip recorded with archive.mode: record")
+    ap.add_argument("--tabs", default="all")
+    ap.add_argument("--scroll", type=int, default=DEFAULT_SCROLL_ROUNDS)
+    ap.add_argument("--concurrency", type=int, default=DEFAULT_FETCH_CONCURRENCY)
+    ap.add_argument("--repeat", type=int, default=1)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    tab_keys = _tab_keys(args.tabs)
+    for i in range(args.repeat):
+        wall, pages, per_tab, stats = asyncio.run(_bench(args.archive, tab_keys, args.scroll, args.concurrency))
+        print(f"run {i + 1}: wall {wall:.1f}s, {pages} page loads, {pages / wall:.2f} pages/s")
+        for k, n in per_tab.items():
+            st = stats.get(k, {})
+            print(f"  {k:>15}: {n:4d} records  links={st.get('links', '-')}  "
+                  f"fetch={st.get('fetch_sec', '-')}s  nav={st.get('nav_sec', '-')}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_extract.py
+#
+# Compare HTML extraction backends on saved pages:
+#   python -m benchmarks.bench_extract --pages saved_pages/ --repeat 5
+#   python -m benchmarks.bench_extract --synthetic 200
+#
+# Article pages are named <uid>_<pid>.html (or <uid>/<pid>.html); pages that
+# contain the video feed are run through extract_video_blocks instead.
+
+import argparse
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from crawler.extract import available_backends, extract_article, extract_video_blocks, parse_html
+
+VIDEO_MARKER = "style_timeline__item__main_lHD"
+
+
+def _synthetic_pages(n: int) -> List[Tuple[str, str]]:
+    rng = random.Random(0)
+    words = ["贵州茅台", "SH600519", "ETF", "基金", "利润", "市场", "HK09888", "增长", "&amp;", "回购"]
+    pages = []
+    for i in range(n):
+        paras = "".join(
+            f"<p>{' '.join(rng.choice(words) for _ in range(rng.randint(20, 80)))}</p>"
+            for _ in range(rng.randint(5, 40))
+        )
+        filler = "".join(f"<div class='nav'><a href='/x/{j}'>link {j}</a></div>" for j in range(300))
+        html = f"""<html><head><script>var a = "<p>x</p>";</script><style>p {{}}</style></head><body>
+        {filler}
+        <div class="article__container">
+          <div class="article__author"><a class="avatar" href="/{1000 + i}"></a>
+            <span class="name">用户{i} 关注</span></div>
+          <h1 class="article__bd__title">标题 {i}</h1>
+          <div class="article__bd__detail">{paras}</div>
+          <time datetime="2025-11-09T02:16:40.000Z">2025-11-09 10:16</time>
+        </div></body></html>"""
+        pages.append((f"https://xueqiu.com/{1000 + i}/{360000000 + i}", html))
+    return pages
+
+
+def _saved_pages(root: Path) -> List[Tuple[str, str]]:
+    pages = []
+    for f in sorted(root.rglob("*.html")):
+        rel = f.relative_to(root).with_suffix("").as_posix().replace("_", "/")
+        pages.append((f"https://xueqiu.com/{rel}", f.read_text(encoding="utf-8", errors="replace")))
+    return pages
+
+
+def _run(backend: str, pages: List[Tuple[str, str]]) -> List:
+    out = []
+    for url, html in pages:
+        if VIDEO_MARKER in html:
+            out.append(extract_video_blocks(html, backend))
+        else:
+            rec = extract_article(html, url, "bench", backend)
+            rec.pop("timestamp")
+            out.append(rec)
+    return out
+
+
+def _same(a, b) -> bool:
+    """Records match; the `html` field may be serialised differently by each
+    parser (<br> vs <br/>, &nbsp;), so it is compared after re-serialising both
+    through BeautifulSoup."""
+    if not isinstance(a, dict):
+        return a == b
+    if {k: v for k, v in a.items() if k != "html"} != {k: v for k, v in b.items() if k != "html"}:
+        return False
+    return a["html"] == b["html"] or parse_html(a["html"], "soup").html() == parse_html(b["html"], "soup").html()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=Path, help="directory of saved .html pages")
+    ap.add_argument("--synthetic", type=int, default=0, help="generate N synthetic article pages instead")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = _synthetic_pages(args.synthetic) if args.synthetic else _saved_pages(args.pages)
+    if not pages:
+        raise SystemExit("no pages to benchmark")
+    mb = sum(len(h.encode("utf-8")) for _, h in pages) / 1e6
+    print(f"{len(pages)} pages, {mb:.1f} MB")
+
+    results: Dict[str, List] = {}
+    timings: Dict[str, float] = {}
+    for backend in available_backends():
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            results[backend] = _run(backend, pages)
+            best = min(best, time.perf_counter() - t0)
+        timings[backend] = best
+        print(f"{backend:>7}: {best:.3f}s  ({len(pages) / best:.0f} pages/s)")
+
+    if "lexbor" in timings:
+        print(f"speedup lexbor vs soup: {timings['soup'] / timings['lexbor']:.1f}x")
+        diffs = [(url, a, b) for (url, _), a, b in zip(pages, results["soup"], results["lexbor"]) if not _same(a, b)]
+        print(f"identical records: {len(pages) - len(diffs)}/{len(pages)}")
+        for url, a, b in diffs[:5]:
+            if isinstance(a, dict):
+                fields = [k for k in a if a.get(k) != b.get(k)]
+                print(f"  differs: {url} fields={fields}")
+            else:
+                print(f"  differs: {url}")
+
+
+if __name__ == "__main__":
+    main()
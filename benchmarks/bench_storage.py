@@ -0,0 +1,113 @@
+# benchmarks/bench_storage.py
+#
+# Append/read cost of the raw record store at crawl-archive scale.
+#
+#   python -m benchmarks.bench_storage --posts 100000 --batch 500
+#
+# Appends synthetic posts in batches (as crawl_tab / live tail do) to
+#   json      - one JSON array, read-modify-write per append (the old append_unique_json)
+#   segments  - datastore/segments.py (append-only JSONL + key index)
+# and reports total append time, the cost of the last append, a full read and
+# the on-disk size. --json-limit caps the quadratic JSON run.
+
+import argparse
+import hashlib
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import orjson
+
+from datastore.segments import SegmentStore
+
+
+def synthetic_posts(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    words = ["茅台", "宁德时代", "SH600519", "$AAPL$", "基金", "降息", "ETF", "估值", "回购", "业绩"]
+    for i in range(n):
+        text = " ".join(rnd.choice(words) for _ in range(rnd.randint(20, 80)))
+        yield {
+            "id": str(1_000_000 + i),
+            "url": f"https://xueqiu.com/{rnd.randint(1, 9_999_999)}/{1_000_000 + i}",
+            "tab": rnd.choice(["hot", "news", "fund", "etf"]),
+            "author": f"user{rnd.randint(1, 5000)}",
+            "title": None,
+            "text": text,
+            "html": f"<div class='article__bd__detail'><p>{text}</p></div>",
+            "text_hash": hashlib.sha1(text.encode()).hexdigest(),
+            "symbols": [],
+            "timestamp": "2025-11-08T00:00:00+00:00",
+        }
+
+
+def _dir_size(p: Path) -> int:
+    if p.is_file():
+        return p.stat().st_size
+    return sum(f.stat().st_size for f in p.rglob("*") if f.is_file())
+
+
+def bench_json(path: Path, posts, batch: int):
+    # the pre-segments append_unique_json, verbatim in behaviour
+    opts = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+    key = lambda d: (d.get("id"), d.get("tab"), d.get("text_hash"))
+    last = 0.0
+    t0 = time.perf_counter()
+    for i in range(0, len(posts), batch):
+        t1 = time.perf_counter()
+        existing = orjson.loads(path.read_bytes()) if path.exists() else []
+        seen = {key(d) for d in existing}
+        existing.extend(p for p in posts[i:i + batch] if key(p) not in seen)
+        path.write_bytes(orjson.dumps(existing, option=opts))
+        last = time.perf_counter() - t1
+    total = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    n = len(orjson.loads(path.read_bytes()))
+    return total, last, time.perf_counter() - t1, n, _dir_size(path)
+
+
+def bench_segments(root: Path, posts, batch: int):
+    store = SegmentStore(root)
+    last = 0.0
+    t0 = time.perf_counter()
+    for i in range(0, len(posts), batch):
+        t1 = time.perf_counter()
+        store.append(posts[i:i + batch])
+        last = time.perf_counter() - t1
+    total = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    # fresh object: includes manifest + segment parsing, like read_json_list
+    n = len(SegmentStore(root).read_all())
+    read = time.perf_counter() - t1
+    t1 = time.perf_counter()
+    SegmentStore(root).keys()
+    print(f"  segments: key index load {time.perf_counter() - t1:.2f}s")
+    return total, last, read, n, _dir_size(root)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=100_000)
+    ap.add_argument("--batch", type=int, default=500)
+    ap.add_argument("--json-limit", type=int, default=20_000,
+                    help="posts for the read-modify-write run (it is O(n^2))")
+    args = ap.parse_args()
+
+    posts = list(synthetic_posts(args.posts))
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        rows = []
+        n_json = min(args.json_limit, args.posts)
+        rows.append(("json", n_json) + bench_json(tmp / "posts.json", posts[:n_json], args.batch))
+        rows.append(("segments", args.posts) + bench_segments(tmp / "posts.seg", posts, args.batch))
+        if n_json < args.posts:
+            rows.append(("segments", n_json) + bench_segments(tmp / "small.seg", posts[:n_json], args.batch))
+
+    print(f"\n{'store':>9} {'posts':>8} {'append':>9} {'last':>8} {'read':>7} {'MB':>7}  (batch {args.batch})")
+    for name, n, total, last, read, count, size in rows:
+        assert count == n, (name, count, n)
+        print(f"{name:>9} {n:>8} {total:>8.2f}s {last * 1000:>6.1f}ms {read:>6.2f}s {size / 1e6:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/bench_summarizer.py
+#
+# Summarizer throughput against a local mock of the chat completions endpoint.
+#
+#   python -m benchmarks.bench_summarizer --posts 300 --latency 0.8 --concurrency 8
+#
+#   sequential  summarize_one + the 0.5s sleep of summarize_tab, one new
+#               connection per request (requests.post); run on --seq-posts
+#               posts and extrapolated to --posts
+#   async       llm.summarizer.AsyncSummarizer, one pooled keep-alive client
+#   batched     AsyncSummarizer.summarize_many, short 7x24-style posts packed
+#               per request under SUMMARY_BATCH's token budget
+#
+# The mock answers every request after --latency seconds (the model's time),
+# rejects --error-rate of them with 429 to exercise the retry path, leaves
+# --drop-rate of the items out of batch answers (those posts fall back to
+# single calls), and counts the TCP connections it accepted.
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm import summarizer
+
+_ANSWER = json.dumps({"summary": "Mock summary.", "sentiment": "neutral",
+                      "themes": ["mock"], "entities": []})
+
+
+class MockChat(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    latency = 0.5
+    error_rate = 0.0
+    drop_rate = 0.0
+    connections = 0
+    requests = 0
+    lock = threading.Lock()
+    rnd = random.Random(3)
+
+    def setup(self):
+        super().setup()
+        with MockChat.lock:
+            MockChat.connections += 1
+
+    def do_POST(self):
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        ids = re.findall(r"^\s*\[id=([^\]]+)\]$", req["messages"][0]["content"], re.M)
+        with MockChat.lock:
+            MockChat.requests += 1
+            fail = MockChat.rnd.random() < self.error_rate
+            kept = [i for i in ids if MockChat.rnd.random() >= self.drop_rate]
+        time.sleep(self.latency)
+        if fail:
+            body, status = b'{"error": "rate limit exceeded"}', 429
+        else:
+            answer = json.dumps([{"id": i, **json.loads(_ANSWER)} for i in kept]) if ids else _ANSWER
+            body = json.dumps({"choices": [{"message": {"content": answer}}]}).encode()
+            status = 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def synthetic_posts(n: int):
+    return [{"id": str(1_000_000 + i), "tab": "hot", "text": f"贵州茅台 SH600519 第{i}条 估值修复"}
+            for i in range(n)]
+
+
+def synthetic_live(n: int):
+    return [{"id": str(2_000_000 + i), "tab": "7x24",
+             "text": f"【快讯】央行今日开展{i % 900 + 100}亿元7天期逆回购操作，中标利率1.40%。"}
+            for i in range(n)]
+
+
+def _reset():
+    MockChat.connections = MockChat.requests = 0
+
+
+def run_sequential(posts):
+    out = []
+    for p in posts:
+        out.append(summarizer.summarize_one(p, "mock-key"))
+        time.sleep(0.5)   # as summarize_tab
+    return out
+
+
+async def run_async(posts, url, concurrency):
+    async with summarizer.AsyncSummarizer("mock-key", concurrency=concurrency, url=url) as s:
+        return await asyncio.gather(*(s.summarize_one(p) for p in posts))
+
+
+async def run_batched(posts, url, concurrency):
+    async with summarizer.AsyncSummarizer("mock-key", concurrency=concurrency, url=url) as s:
+        res = [r for r, _ in await s.summarize_many(posts)]
+        return res, s.fallbacks
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=300)
+    ap.add_argument("--seq-posts", type=int, default=10)
+    ap.add_argument("--latency", type=float, default=0.8, help="seconds per mock completion")
+    ap.add_argument("--error-rate", type=float, default=0.02, help="share of requests answered with 429")
+    ap.add_argument("--drop-rate", type=float, default=0.01, help="share of batch items left out of answers")
+    ap.add_argument("--concurrency", type=int, default=8)
+    args = ap.parse_args()
+
+    MockChat.latency, MockChat.error_rate, MockChat.drop_rate = args.latency, args.error_rate, args.drop_rate
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockChat)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/inference/v1/chat/completions"
+    summarizer.FIREWORKS_URL = url   # sequential path posts to the module URL
+    summarizer.LLM_CACHE = {**summarizer.LLM_CACHE, "enabled": False}   # every post must reach the mock
+    posts = synthetic_posts(args.posts)
+    print(f"mock endpoint {url}: {args.latency}s per completion, {args.error_rate:.0%} answered 429")
+
+    try:
+        _reset()
+        n = min(args.seq_posts, len(posts))
+        t0 = time.perf_counter()
+        res = run_sequential(posts[:n])
+        sec = time.perf_counter() - t0
+        print(f"sequential: {n} posts in {sec:6.2f}s  -> {sec / n * len(posts):7.1f}s for {len(posts)} "
+              f"({n / sec:5.2f} posts/s, {sum(1 for r in res if r)} ok, "
+              f"{MockChat.requests} requests, {MockChat.connections} connections)")
+
+        _reset()
+        t0 = time.perf_counter()
+        res = asyncio.run(run_async(posts, url, args.concurrency))
+        sec = time.perf_counter() - t0
+        print(f"async x{args.concurrency}: {len(posts)} posts in {sec:6.2f}s "
+              f"({len(posts) / sec:5.2f} posts/s, {sum(1 for r in res if r)} ok, "
+              f"{MockChat.requests} requests, {MockChat.connections} connections)")
+
+        live = synthetic_live(args.posts)
+        for name, fn in (("async", run_async), ("batched", run_batched)):
+            _reset()
+            t0 = time.perf_counter()
+            res = asyncio.run(fn(live, url, args.concurrency))
+            sec = time.perf_counter() - t0
+            res, fallbacks = res if name == "batched" else (res, 0)
+            print(f"{name} x{args.concurrency} (7x24): {len(live)} posts in {sec:6.2f}s "
+                  f"({len(live) / sec:5.2f} posts/s, {sum(1 for r in res if r)} ok, "
+                  f"{MockChat.requests} requests, {fallbacks} fell back to single calls)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_tickers.py
+#
+# Ticker detection throughput on synthetic posts.
+#
+#   python -m benchmarks.bench_tickers --posts 1000000
+#
+#   regex-loop  the previous detect_symbols: re.findall once per TICKER_PATTERNS entry
+#   detect      tickers.TickerMatcher.detect, one combined scan per post
+#   batch       TickerMatcher.detect_many over chunks of --chunk posts
+#
+# Also prints how many posts each finds symbols in: the old loop sees codes
+# only, the matcher also cashtags and dictionary names. REGRESSIONS is checked
+# before timing.
+
+import argparse
+import random
+import re
+import time
+
+from config import TICKER_PATTERNS
+from tickers import default_matcher
+
+_OLD_PATTERNS = [r"\bS[HZ]\d{6}\b", r"\bHK\d{4,5}\b", r"\b\d{6}\.[A-Z]{2}\b"]
+
+
+def old_detect(text: str):
+    syms = set()
+    for pat in _OLD_PATTERNS:
+        for m in re.findall(pat, text or ""):
+            syms.add(m.upper())
+    return sorted(syms)
+
+
+# (text, expected codes): cashtag spans that do not resolve must not hide codes
+REGRESSIONS = [
+    ("price $15 SH600519 now $3", ["SH600519"]),
+    ("sold $5 of 600519.SH, $2 fee", ["SH600519"]),
+    ("$5 HK09888 $", ["HK09888"]),
+    ("$贵州茅台(SH600519)$ 买入BJ830799", ["BJ830799", "SH600519"]),
+]
+
+
+def check_regressions(matcher):
+    for text, expected in REGRESSIONS:
+        assert matcher.detect(text) == expected, f"{text!r}: {matcher.detect(text)} != {expected}"
+        assert matcher.detect_many([text]) == [expected], f"{text!r}: detect_many differs"
+
+
+def synthetic_texts(n: int, seed: int = 11):
+    rnd = random.Random(seed)
+    names = list(default_matcher().names)
+    filler = ["今天", "市场", "继续", "震荡", "北向资金", "净流入", "估值", "修复", "看好", "回调", "加仓", "，", "。"]
+    for _ in range(n):
+        parts = [rnd.choice(filler) for _ in range(rnd.randint(10, 60))]
+        r = rnd.random()
+        if r < 0.25:
+            parts.insert(rnd.randrange(len(parts)), f"SH60{rnd.randint(0, 9999):04d}")
+        elif r < 0.4:
+            name = rnd.choice(names)
+            parts.insert(rnd.randrange(len(parts)), f"${name}({default_matcher().names[name]})$")
+        elif r < 0.6:
+            parts.insert(rnd.randrange(len(parts)), rnd.choice(names))
+        yield "".join(parts)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=1_000_000)
+    ap.add_argument("--chunk", type=int, default=1000)
+    args = ap.parse_args()
+
+    matcher = default_matcher()
+    check_regressions(matcher)
+    print(f"{len(TICKER_PATTERNS)} code patterns, {len(matcher.names)} dictionary names")
+    texts = list(synthetic_texts(args.posts))
+    print(f"{len(texts)} posts, avg {sum(map(len, texts)) / len(texts):.0f} chars")
+
+    runs = {
+        "regex-loop": lambda: [old_detect(t) for t in texts],
+        "detect": lambda: [matcher.detect(t) for t in texts],
+        "batch": lambda: [s for i in range(0, len(texts), args.chunk)
+                          for s in matcher.detect_many(texts[i:i + args.chunk])],
+    }
+    results = {}
+    for name, fn in runs.items():
+        t0 = time.perf_counter()
+        results[name] = fn()
+        sec = time.perf_counter() - t0
+        hits = sum(1 for s in results[name] if s)
+        print(f"{name:>11}: {sec:6.2f}s  {len(texts) / sec / 1000:7.0f}k posts/s  posts with symbols: {hits}")
+    assert results["detect"] == results["batch"], "detect_many must match detect"
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,58 @@ from datetime import datetime, timezone
 PROJECT_ROOT = Path(__file__).parent
 STORAGE_ROOT = PROJECT_ROOT / "storage"
 STORAGE_ROOT.mkdir(exist_ok=True)
+# Cross-job index of already-parsed articles (see crawler/seen_index.py)
+SEEN_INDEX_ROOT = STORAGE_ROOT / "_index"
+# Recorded response archives for offline replay / benchmarks (HAR zips)
+ARCHIVE_ROOT = STORAGE_ROOT / "_archives"
+# Browser cookies / localStorage kept between runs
+BROWSER_STATE_PATH = STORAGE_ROOT / "_index" / "browser_state.json"
+# Raw/summary record files: "segments" = append-only JSONL segments in
+# posts_<tab>.seg/ (datastore/segments.py); "json" = one JSON array rewritten per append
+STORAGE_FORMAT = "segments"
+# Cross-job SQLite store of posts / summaries / symbol+theme links (datastore/post_store.py)
+POST_STORE_PATH = STORAGE_ROOT / "_index" / "posts.sqlite3"
+# Partitioned Parquet export of all jobs for analysis (datastore/columnar.py, needs pyarrow)
+COLUMNAR_ROOT = STORAGE_ROOT / "_columnar"
+# Post HTML bodies: "blobs" = compressed, content-addressed files in storage/_blobs
+# (records keep only "html_hash", datastore/blobs.py); "inline" = "html" in the record
+HTML_STORAGE = "blobs"
+BLOB_ROOT = STORAGE_ROOT / "_blobs"
+# Near-duplicate clusters of post text across jobs (datastore/near_dup.py);
+# the summarizer calls the LLM once per cluster
+NEAR_DUP_ROOT = STORAGE_ROOT / "_index"
+NEAR_DUP = {
+    "max_distance": 6,   # SimHash bits that may differ (of 64)
+    "bands": 8,          # LSH bands; must be > max_distance
+    "min_chars": 12,     # shorter texts (after stripping punctuation) are never merged
+}
+# Disk cache of parsed LLM results (llm/cache.py), keyed by normalized post content,
+# MODEL, prompt version and sampling params; evicted by age, then least recently used over max_mb
+LLM_CACHE_PATH = STORAGE_ROOT / "_index" / "llm_cache.sqlite3"
+LLM_CACHE = {
+    "enabled": True,
+    "max_mb": 512,
+    "max_age_days": 90,
+}
+# Batched summarization (sum_batch: true): posts of these tabs are packed into one
+# request up to an estimated prompt size; the answer is a JSON array keyed by post id
+SUMMARY_BATCH = {
+    "tabs": ["7x24", "news"],
+    "max_prompt_tokens": 3000,
+    "max_posts": 25,
+    "output_tokens_per_post": 160,   # added to max_tokens per post in the batch
+}
+# Job catalog: storage/<job>/manifest.json per job + this global index (datastore/catalog.py)
+CATALOG_PATH = STORAGE_ROOT / "_index" / "catalog.json"
+# Monthly, deduplicated archives of compacted jobs
+COMPACTED_ROOT = STORAGE_ROOT / "_compacted"
+# Retention per job folder, in days since the job ran; None = keep forever.
+# raw/ is only dropped after the job was compacted into COMPACTED_ROOT.
+RETENTION = {
+    "raw_days": 30,
+    "summary_days": None,
+    "reports_days": None,
+}
 
 def ts():
     return datetime.now(timezone.utc).isoformat()
@@ -13,6 +65,14 @@ def default_jobname():
     # e.g., run_20251108_003825
     return "run_" + datetime.now().strftime("%Y%m%d_%H%M%S")
 
+# 7x24 live tail (mode: tail); overridable with `tail:` in run_config.yaml
+TAIL_DEFAULTS = {
+    "interval": 5,       # seconds between polls of the live table
+    "refresh": 300,      # seconds between page reloads
+    "duration": None,    # seconds to run; None = until interrupted
+    "summarize": True,   # summarize new items immediately
+}
+
 # Tabs and CSS selectors (fall back aware)
 TABS = {
     # 显示名: (key, top_nav_text)
@@ -60,12 +120,71 @@ TAB_SELECTORS = {
     ],
 }
 
-# How many scroll rounds per tab
+# How many scroll rounds per tab (upper bound; scrolling stops early when the feed stalls)
 DEFAULT_SCROLL_ROUNDS = 6
+# Max wait for new feed nodes after each scroll
+DEFAULT_SCROLL_TIMEOUT_MS = 5000
+# Stop scrolling after this many rounds without feed growth
+DEFAULT_STALL_ROUNDS = 2
+
+# Max article pages open at once (shared by all tabs)
+DEFAULT_FETCH_CONCURRENCY = 4
+# LLM requests in flight at once when summarizing (shared by all tabs)
+DEFAULT_SUMMARIZE_CONCURRENCY = 8
+
+# Shared navigation rate limiter (crawler/rate_limit.py), per host
+RATE_LIMIT = {
+    "rate": 2.0,          # requests/sec
+    "burst": 4,           # bucket size
+    "min_rate": 0.2,      # floor when throttled
+    "base_backoff": 2.0,  # seconds, doubled per retry, full jitter
+    "max_backoff": 60.0,
+}
+# URL / page-title substrings that mean we were served a captcha / WAF page
+CAPTCHA_MARKERS = ["captcha", "_waf_", "滑动验证", "安全验证"]
+
+# Tabs scrolled at the same time; each uses one home page that is reused
+# (tab switched in place) by the next tab instead of reloading HOME_URL
+DEFAULT_TAB_PARALLELISM = 2
+
+# HTML parser for article / video extraction: "lexbor" (selectolax, fast) or "soup" (BeautifulSoup + lxml)
+HTML_BACKEND = "lexbor"
+# Processes parsing article HTML off the event loop (0 = parse inline)
+DEFAULT_PARSE_WORKERS = 2
+
+# Timeline XHR endpoints whose JSON is captured while a tab scrolls (crawler/api_capture.py)
+TIMELINE_API_PATTERNS = [
+    "/statuses/hot/listV",                        # 热门
+    "/statuses/public_timeline_by_category.json",  # 基金 / ETF / 资讯 ...
+    "/statuses/livenews/list.json",               # 7x24
+]
+# Tabs whose posts are taken from captured timeline JSON by default
+CAPTURE_TABS = ["hot", "fund", "etf", "7x24"]
+
+# Request blocking profiles, chosen per tab via run_config.yaml tab_options.<tab>.block
+#   types:    Playwright resource types to abort
+#   patterns: substrings of URLs to abort
+BLOCK_PROFILES = {
+    "none": {"types": [], "patterns": []},
+    "minimal": {   # fonts / ads / analytics only
+        "types": [],
+        "patterns": ["fonts.googleapis.com", "analytics", "ads"],
+    },
+    "text": {      # scripts + XHR only; everything we never read is dropped
+        "types": ["image", "media", "font", "stylesheet"],
+        "patterns": ["fonts.googleapis.com", "analytics", "ads",
+                     "xavatar.imedao.com", "xqimg.imedao.com", ".m3u8", ".mp4"],
+    },
+}
+DEFAULT_BLOCK_PROFILE = "minimal"
 
-# Regex patterns for ticker detection
+# Regex patterns for ticker codes (tickers.py folds them, Xueqiu cashtags and the
+# name dictionary into one matcher; hits are canonicalized, e.g. 600519.SH -> SH600519).
+# ASCII look-arounds instead of \b: in "买入SH600519" the CJK char is also a word char.
 TICKER_PATTERNS = [
-    r"\bS[HZ]\d{6}\b",      # SH600519, SZ000001
-    r"\bHK\d{4,5}\b",      # HK09888
-    r"\b\d{6}\.[A-Z]{2}\b" # 600519.SH style
+    r"(?<![A-Za-z0-9])(?:S[HZ]|BJ)\d{6}(?![0-9])",   # SH600519, SZ000001, BJ830799
+    r"(?<![A-Za-z0-9])HK\d{4,5}(?![0-9])",         # HK09888
+    r"(?<![A-Za-z0-9.])(?:\d{6}\.(?:SH|SZ|BJ)|\d{4,5}\.HK)(?![A-Za-z])"  # 600519.SH / 0700.HK style
 ]
+# Company name -> code dictionary for the matcher (name<TAB>code per line)
+TICKER_DICT_PATH = PROJECT_ROOT / "tickers.tsv"
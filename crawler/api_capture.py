@@ -0,0 +1,148 @@
+# crawler/api_capture.py
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urljoin
+
+import orjson
+
+from config import TIMELINE_API_PATTERNS, ts
+from utils import detect_symbols, detect_symbols_many
+from crawler.seen_index import article_key
+from crawler.extract import parse_html
+
+logger = logging.getLogger("crawler.api")
+HOME_URL = "https://xueqiu.com/"
+
+
+def _iso_ms(ms: Any) -> Optional[str]:
+    # same shape as <time datetime="2025-11-09T02:16:40.000Z">
+    try:
+        ms = int(ms)
+    except (TypeError, ValueError):
+        return None
+    dt = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{ms % 1000:03d}Z"
+
+
+def _is_status(d: Dict[str, Any]) -> bool:
+    return "id" in d and ("text" in d or "description" in d) and ("user" in d or "created_at" in d)
+
+
+def _iter_statuses(node: Any) -> Iterator[Dict[str, Any]]:
+    """Yield status-like dicts anywhere in a timeline payload.
+
+    Timeline endpoints wrap statuses differently (`list[].data` as a JSON string,
+    `items[].original_status`, plain `items[]` for 7x24), so walk the tree.
+    """
+    if isinstance(node, dict):
+        if _is_status(node):
+            yield node
+            return
+        for v in node.values():
+            if isinstance(v, str) and v[:1] == "{":
+                try:
+                    v = orjson.loads(v)
+                except orjson.JSONDecodeError:
+                    continue
+            yield from _iter_statuses(v)
+    elif isinstance(node, list):
+        for v in node:
+            yield from _iter_statuses(v)
+
+
+def status_to_record(status: Dict[str, Any], tab_key: str, detect: bool = True) -> Dict[str, Any]:
+    """Map one API status to the record schema produced by _parse_article.
+
+    detect=False leaves "symbols" empty for a caller that detects them in batch.
+    """
+    user = status.get("user") or {}
+    body_html = status.get("text") or ""
+    truncated = bool(status.get("truncated")) or not body_html
+    if not body_html:
+        body_html = status.get("description") or ""
+    text = parse_html(body_html).text(separator="\n", strip=True) if body_html else ""
+
+    status_id = str(status.get("id"))
+    target = status.get("target")
+    if target:
+        url = urljoin(HOME_URL, target)
+    elif user.get("id"):
+        url = urljoin(HOME_URL, f"{user['id']}/{status_id}")
+    else:
+        url = None
+    # 7x24 items carry their own live-news id; the post id is the one in the URL
+    key = article_key(url) if url else status_id
+    post_id = key if key.isdigit() else status_id
+
+    return {
+        "id": post_id,
+        "url": url,
+        "tab": tab_key,
+        "author": user.get("screen_name"),
+        "author_id": str(user["id"]) if user.get("id") else None,
+        "title": status.get("title") or None,
+        "text": text,
+        "html": body_html,
+        "symbols": detect_symbols(text) if detect else [],
+        "post_time": _iso_ms(status.get("created_at")),
+        "timestamp": ts(),
+        "truncated": truncated,
+    }
+
+
+def normalize_payload(payload: Any, tab_key: str) -> List[Dict[str, Any]]:
+    records = [status_to_record(s, tab_key, detect=False) for s in _iter_statuses(payload)]
+    for rec, symbols in zip(records, detect_symbols_many([r["text"] for r in records])):
+        rec["symbols"] = symbols
+    return records
+
+
+class TimelineCapture:
+    """Records timeline XHR JSON seen by a tab page while it scrolls."""
+
+    def __init__(self, tab_key: str, patterns: Optional[List[str]] = None):
+        self.tab_key = tab_key
+        self.patterns = patterns or TIMELINE_API_PATTERNS
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.responses = 0
+        self._pending: set = set()
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+
+    def detach(self, page):
+        page.remove_listener("response", self._on_response)
+
+    def _on_response(self, response):
+        if not any(p in response.url for p in self.patterns):
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _read(self, response):
+        try:
+            payload = await response.json()
+        except Exception as e:
+            logger.debug(f"[{self.tab_key}] non-JSON timeline response {response.url}: {e}")
+            return
+        self.responses += 1
+        for rec in normalize_payload(payload, self.tab_key):
+            prev = self.by_id.get(rec["id"])
+            # keep the full-text version if the same post shows up twice
+            if prev is None or (prev["truncated"] and not rec["truncated"]):
+                self.by_id[rec["id"]] = rec
+
+    async def drain(self):
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def complete(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in r.items() if k != "truncated"}
+                for r in self.by_id.values() if not r["truncated"]]
+
+    def truncated_urls(self) -> List[str]:
+        return [r["url"] for r in self.by_id.values() if r["truncated"] and r["url"]]
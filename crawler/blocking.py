@@ -0,0 +1,96 @@
+# crawler/blocking.py
+
+import logging
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, Optional
+
+from config import BLOCK_PROFILES
+
+logger = logging.getLogger("crawler.block")
+
+
+class BlockProfile:
+    def __init__(self, name: str, types: Iterable[str] = (), patterns: Iterable[str] = ()):
+        self.name = name
+        self.types = frozenset(types)
+        self.patterns = tuple(patterns)
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        return resource_type in self.types or any(p in url for p in self.patterns)
+
+
+class ResourceBlocker:
+    """Context-wide route handler applying a per-tab blocking profile.
+
+    Pages are shared between tabs (page pool), so each page is tagged with the
+    tab it is currently working for via `assign()`; requests are attributed to
+    that tab. Blocked bytes are never downloaded, so they are estimated from
+    the mean size of allowed responses of the same resource type.
+    """
+
+    def __init__(self, profile_for_tab, profiles: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.profiles = {
+            name: BlockProfile(name, p.get("types", ()), p.get("patterns", ()))
+            for name, p in (profiles or BLOCK_PROFILES).items()
+        }
+        self.profile_for_tab = profile_for_tab
+        self._page_tab: Dict[Any, str] = {}
+        self.blocked = defaultdict(Counter)       # tab -> resource type -> requests
+        self.allowed = defaultdict(Counter)       # tab -> resource type -> requests
+        self.allowed_bytes = defaultdict(Counter)  # tab -> resource type -> bytes
+        self._type_bytes = Counter()
+        self._type_sized = Counter()
+
+    def assign(self, page, tab_key: str):
+        self._page_tab[page] = tab_key
+
+    def _tab_of(self, request) -> str:
+        try:
+            return self._page_tab.get(request.frame.page, "default")
+        except Exception:
+            # service worker / detached frame requests have no page
+            return "default"
+
+    def _profile(self, tab_key: str) -> BlockProfile:
+        name = self.profile_for_tab(tab_key)
+        if name not in self.profiles:
+            logger.warning(f"Unknown block profile '{name}' for tab {tab_key}; using 'minimal'")
+            name = "minimal"
+        return self.profiles[name]
+
+    async def handle(self, route):
+        req = route.request
+        tab = self._tab_of(req)
+        if self._profile(tab).blocks(req.resource_type, req.url):
+            self.blocked[tab][req.resource_type] += 1
+            await route.abort()
+        else:
+            self.allowed[tab][req.resource_type] += 1
+            await route.continue_()
+
+    def on_response(self, response):
+        try:
+            size = int(response.headers.get("content-length") or 0)
+            rtype = response.request.resource_type
+            tab = self._tab_of(response.request)
+        except Exception:
+            return
+        if size:
+            self.allowed_bytes[tab][rtype] += size
+            self._type_bytes[rtype] += size
+            self._type_sized[rtype] += 1
+
+    def summary(self, tab_key: str) -> Dict[str, Any]:
+        blocked = self.blocked[tab_key]
+        est_saved = 0
+        for rtype, n in blocked.items():
+            if self._type_sized[rtype]:
+                est_saved += n * self._type_bytes[rtype] // self._type_sized[rtype]
+        return {
+            "profile": self._profile(tab_key).name,
+            "requests_blocked": sum(blocked.values()),
+            "requests_allowed": sum(self.allowed[tab_key].values()),
+            "bytes_allowed": sum(self.allowed_bytes[tab_key].values()),
+            "bytes_blocked_est": est_saved,
+            "blocked_by_type": dict(blocked),
+        }
@@ -2,21 +2,32 @@
 
 import asyncio
 import logging
-import hashlib
+import os
+import time
+from collections import Counter, defaultdict
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+import orjson
 from playwright.async_api import async_playwright
-from config import TABS, TAB_SELECTORS, DEFAULT_SCROLL_ROUNDS, ts
-from utils import ensure_dir, append_unique_json, detect_symbols
+from config import (TABS, TAB_SELECTORS, DEFAULT_SCROLL_ROUNDS, DEFAULT_FETCH_CONCURRENCY, DEFAULT_BLOCK_PROFILE,
+                    DEFAULT_SCROLL_TIMEOUT_MS, DEFAULT_STALL_ROUNDS, CAPTURE_TABS,
+                    HTML_BACKEND, DEFAULT_PARSE_WORKERS, DEFAULT_TAB_PARALLELISM, BROWSER_STATE_PATH,
+                    CAPTCHA_MARKERS, HTML_STORAGE)
+from utils import ensure_dir, append_unique_json
+from crawler.page_pool import PagePool
+from crawler.http_fetch import HttpArticleFetcher
+from crawler.seen_index import SeenIndex, article_key
+from crawler.blocking import ResourceBlocker
+from crawler.api_capture import TimelineCapture
+from crawler.parse_pool import ParsePool
+from crawler.checkpoint import TabCheckpoint
+from crawler.rate_limit import HostRateLimiter, THROTTLE_STATUS
+from datastore.blobs import BlobStore
 
 logger = logging.getLogger("crawler")
 HOME_URL = "https://xueqiu.com/"
-
-
-def _hash_text(s: str) -> str:
-    return hashlib.sha1((s or "").encode("utf-8")).hexdigest()
+TABS_CONTAINER = "div.style_home_timeline_tabs_2Sm a"
 
 
 def _abs_url(href: Optional[str]) -> Optional[str]:
@@ -25,38 +36,159 @@ def _abs_url(href: Optional[str]) -> Optional[str]:
     return urljoin(HOME_URL, href)
 
 
+# -------------------------------------------------------
+# In-page link extraction
+# -------------------------------------------------------
+# Every node that has been read is tagged with data-xq-seen, so each scroll
+# round only walks the nodes appended since the previous round. The tags are
+# cleared after an in-place tab switch (_CLEAR_SEEN_JS): React may reuse feed
+# nodes across tabs, and they must be read again for the new tab.
+#   mode "anchor": items are <a> elements, href read from the item itself
+#   mode "row":    items are table rows, href from the first <a> in the 3rd <td>
+#   mode "first":  items are cards, href from the first <a href> inside
+_NEW_HREFS_JS = """
+(rule) => {
+    const out = [];
+    for (const el of document.querySelectorAll(rule.items + ':not([data-xq-seen])')) {
+        el.setAttribute('data-xq-seen', '1');
+        let a = null;
+        if (rule.mode === 'anchor') {
+            a = el;
+        } else if (rule.mode === 'row') {
+            const tds = el.querySelectorAll('td');
+            a = tds.length >= 3 ? tds[2].querySelector('a') : null;
+        } else {
+            a = el.querySelector('a[href]');
+        }
+        const href = a && a.getAttribute('href');
+        if (href) out.push(href);
+    }
+    return out;
+}
+"""
+
+_CLEAR_SEEN_JS = """
+() => { for (const el of document.querySelectorAll('[data-xq-seen]')) el.removeAttribute('data-xq-seen'); }
+"""
+
+
+_FEED_SIZE_JS = """
+(sel) => ({nodes: document.querySelectorAll(sel).length, height: document.body.scrollHeight})
+"""
+
+
+def _link_rule(tab_key: str) -> Dict[str, str]:
+    if tab_key == "news":
+        return {"items": "a[href*='/S/']", "mode": "anchor"}
+    if tab_key == "7x24":
+        return {"items": "table.AnonymousHome_home__timeline-live__tb_2kb tr", "mode": "row"}
+    if tab_key == "video":
+        return {"items": "article.style_timeline__item_3WW", "mode": "first"}
+    return {"items": "a.style_fake-anchor_2cg.fake-anchor[href]", "mode": "anchor"}
+
+
 class XueqiuBrowserCrawler:
-    def __init__(self, raw_dir: Path, scroll_rounds: int = DEFAULT_SCROLL_ROUNDS):
+    def __init__(self, raw_dir: Path, scroll_rounds: int = DEFAULT_SCROLL_ROUNDS,
+                 concurrency: int = DEFAULT_FETCH_CONCURRENCY, fetch_delay: float = 0.2,
+                 tab_options: Optional[Dict[str, Dict[str, Any]]] = None,
+                 seen_index: Optional[SeenIndex] = None, seen_mode: str = "copy",
+                 job_name: Optional[str] = None, html_backend: Optional[str] = None,
+                 parse_workers: int = DEFAULT_PARSE_WORKERS, tab_parallelism: int = DEFAULT_TAB_PARALLELISM,
+                 resume: bool = False, rate_limit: Optional[Dict[str, Any]] = None,
+                 archive_mode: str = "off", archive_path: Optional[Path] = None):
         self.raw_dir = raw_dir
         ensure_dir(self.raw_dir)
         self.scroll_rounds = scroll_rounds
+        # per-tab jsonl + checkpoints; resume=True continues an interrupted job in the same raw_dir
+        self.stream_dir = raw_dir / "_stream"
+        self.resume = resume
+        self.concurrency = concurrency
+        self.fetch_delay = fetch_delay
+        # per-tab overrides, e.g. {"default": {"fetch": "browser"}, "news": {"fetch": "http"}}
+        self.tab_options = tab_options or {}
+        # articles parsed by earlier jobs: "skip" drops them, "copy" reuses the stored record
+        self.seen_index = seen_index
+        self.seen_mode = seen_mode
+        self.job_name = job_name or raw_dir.parent.name
+        self.html_backend = html_backend or HTML_BACKEND
+        self.parse_workers = parse_workers
+        self.parser: Optional[ParsePool] = None
+        # "record": save every response to a HAR archive; "replay": serve only from it (offline)
+        if archive_mode != "off" and archive_path is None:
+            raise ValueError(f"archive_mode={archive_mode!r} needs an archive_path")
+        self.archive_mode = archive_mode
+        self.archive_path = archive_path
+        if archive_mode == "replay" and not Path(archive_path).exists():
+            raise FileNotFoundError(f"Replay archive not found: {archive_path}")
+        # one limiter for every navigation of this crawler (pages and HTTP fetches)
+        self.limiter = HostRateLimiter(**(rate_limit or {}))
+        self.pool: Optional[PagePool] = None
+        # tabs scrolled at once; each holds a warm home page
+        self.tab_parallelism = tab_parallelism
+        self.tab_pages: Optional[PagePool] = None
+        self.http: Optional[HttpArticleFetcher] = None
+        self.blocker = ResourceBlocker(lambda tab: self._tab_opt(tab, "block", DEFAULT_BLOCK_PROFILE))
+        # article html goes to the shared blob store; records keep html_hash
+        self.blobs = BlobStore() if HTML_STORAGE == "blobs" else None
+        self.tab_stats: Dict[str, Dict[str, Any]] = {}
+        self.fetch_counts: Dict[str, Counter] = defaultdict(Counter)
+
+    def _tab_opt(self, tab_key: str, name: str, default: Any = None) -> Any:
+        for scope in (tab_key, "default"):
+            opts = self.tab_options.get(scope) or {}
+            if name in opts:
+                return opts[name]
+        return default
 
     # -------------------------------------------------------
     # Safe goto with retry
     # -------------------------------------------------------
     async def safe_goto(self, page, url, wait="domcontentloaded", retries=3):
         for attempt in range(retries):
+            await self.limiter.acquire(url)
             try:
-                await page.goto(url, wait_until=wait, timeout=60000)
-                return True
+                resp = await page.goto(url, wait_until=wait, timeout=60000)
+                reason = await self._throttle_reason(page, resp)
+                if reason is None:
+                    self.limiter.on_success(url)
+                    return True
+                self.limiter.on_throttle(url, reason, attempt)
+                logger.warning(f"[Goto Retry {attempt+1}/{retries}] {url} throttled: {reason}")
             except Exception as e:
+                self.limiter.on_error(url)
                 logger.warning(f"[Goto Retry {attempt+1}/{retries}] {url} failed: {e}")
-                await asyncio.sleep(2)
+                await asyncio.sleep(self.limiter.backoff(attempt))
         logger.error(f"[Goto Fail] Could not load {url} after {retries} attempts.")
         return False
 
+    async def _throttle_reason(self, page, resp) -> Optional[str]:
+        if resp is not None and resp.status in THROTTLE_STATUS:
+            return str(resp.status)
+        if any(m in page.url.lower() for m in CAPTCHA_MARKERS):
+            return "captcha"
+        try:
+            title = (await page.title()).lower()
+        except Exception:
+            return None
+        return "captcha" if any(m in title for m in CAPTCHA_MARKERS) else None
+
     # -------------------------------------------------------
     # Go to tab safely
     # -------------------------------------------------------
     async def _goto_tab(self, page, tab_label_cn: str):
-        success = await self.safe_goto(page, HOME_URL, wait="domcontentloaded")
-        if not success:
-            return
-        try:
-            await page.wait_for_selector("div.style_home_timeline_tabs_2Sm a", timeout=10000)
-        except:
-            logger.warning("Tabs container not found; fallback wait.")
-            await page.wait_for_timeout(3000)
+        # warm page: home already loaded by an earlier tab -> switch tab in place
+        warm = await self._home_loaded(page)
+        if not warm:
+            success = await self.safe_goto(page, HOME_URL, wait="domcontentloaded")
+            if not success:
+                return
+            try:
+                await page.wait_for_selector(TABS_CONTAINER, timeout=10000)
+            except:
+                logger.warning("Tabs container not found; fallback wait.")
+                await page.wait_for_timeout(3000)
+        else:
+            await page.evaluate("window.scrollTo(0, 0)")
 
         try:
             await page.get_by_role("link", name=tab_label_cn).first.click(timeout=2000)
@@ -66,10 +198,71 @@ class XueqiuBrowserCrawler:
             except:
                 logger.warning(f"Tab '{tab_label_cn}' not clickable; staying on home.")
         await page.wait_for_timeout(1000)
+        if warm:
+            await page.evaluate(_CLEAR_SEEN_JS)
 
-    async def _load_more(self, page):
+    async def _home_loaded(self, page) -> bool:
+        if not page.url.startswith(HOME_URL):
+            return False
+        try:
+            return await page.query_selector(TABS_CONTAINER) is not None
+        except Exception:
+            return False
+
+    async def _load_more(self, page, tab_key: str) -> bool:
+        """Scroll to the bottom and wait until the feed grows (or the tab's timeout passes)."""
+        feed_sel = ", ".join(TAB_SELECTORS.get(tab_key, [])) or "body *"
+        timeout = self._tab_opt(tab_key, "scroll_timeout_ms", DEFAULT_SCROLL_TIMEOUT_MS)
+        before = await page.evaluate(_FEED_SIZE_JS, feed_sel)
         await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        await page.wait_for_timeout(1200)
+        try:
+            await page.wait_for_function(
+                "([sel, n, h]) => document.querySelectorAll(sel).length > n || document.body.scrollHeight > h",
+                arg=[feed_sel, before["nodes"], before["height"]],
+                timeout=timeout,
+                polling=100,
+            )
+            return True
+        except Exception:
+            return False
+
+    async def _scroll_feed(self, page, tab_key: str, rounds: int) -> set:
+        """Collect links until `target_links` is reached, the feed stalls for
+        `stall_rounds` rounds, or `rounds` rounds have run."""
+        target = self._tab_opt(tab_key, "target_links")
+        stall_limit = self._tab_opt(tab_key, "stall_rounds", DEFAULT_STALL_ROUNDS)
+        all_links, timings, stalled = set(), [], 0
+
+        for i in range(rounds):
+            t0 = time.perf_counter()
+            new_links = await self._collect_links(page, tab_key)
+            all_links.update(new_links)
+            t_collect = time.perf_counter() - t0
+
+            stop = None
+            if target and len(all_links) >= target:
+                stop = "target"
+            else:
+                grew = await self._load_more(page, tab_key)
+                stalled = 0 if grew else stalled + 1
+                if stalled >= stall_limit:
+                    stop = "stalled"
+
+            timings.append({
+                "round": i + 1,
+                "new_links": len(new_links),
+                "total_links": len(all_links),
+                "collect_sec": round(t_collect, 3),
+                "round_sec": round(time.perf_counter() - t0, 3),
+            })
+            if stop:
+                logger.info(f"[{tab_key}] scroll stopped after {i + 1}/{rounds} rounds ({stop})")
+                break
+
+        self.tab_stats.setdefault(tab_key, {})["scroll_rounds"] = timings
+        logger.info(f"[{tab_key}] {len(all_links)} links in {len(timings)} rounds, "
+                    f"{sum(t['round_sec'] for t in timings):.1f}s scrolling")
+        return all_links
 
     # -------------------------------------------------------
     # Collect article URLs per tab
@@ -121,232 +314,286 @@ class XueqiuBrowserCrawler:
     #                         seen.add(absu)
 
     #     return list(seen)
-    async def _collect_links(self, page, tab_key: str, tab_label) -> list[str]:
+    async def _collect_links(self, page, tab_key: str) -> list[str]:
         seen = set()
 
-
+        # the tab is selected once by _goto_tab; no re-click per round
+        # runs in the page; only nodes not returned in an earlier round are visited
         try:
-            # find the tab by inner text and click
-            await page.click(f"text={tab_label}")
-            await page.wait_for_timeout(1500)  # allow time for content to load
+            hrefs = await page.evaluate(_NEW_HREFS_JS, _link_rule(tab_key))
         except Exception as e:
-            logger.warning(f"⚠️ Tab click failed for {tab_label}: {e}")
-            
-        html = await page.content()
-        soup = BeautifulSoup(html, "lxml")
-
-        if tab_key in ["hot", "fund", "expert", "private_equity", "etf"]:
-            anchors = soup.select("a.style_fake-anchor_2cg.fake-anchor[href]")
-            for a in anchors:
-                href = a.get("href", "")
+            logger.warning(f"[{tab_key}] link extraction failed: {e}")
+            return []
+
+        for href in hrefs:
+            if tab_key in ["hot", "fund", "expert", "private_equity", "etf", "video"]:
                 if href and href.count("/") >= 2 and href.strip("/").split("/")[-1].isdigit():
-                    absu = urljoin(HOME_URL, href)
-                    seen.add(absu)
+                    seen.add(urljoin(HOME_URL, href))
 
-        elif tab_key == "news":
-            anchors = soup.select("a[href*='/S/']")
-            for a in anchors:
-                href = a.get("href", "")
+            elif tab_key == "news":
                 if "/S/" in href and href.count("/") >= 3:
-                    absu = urljoin(HOME_URL, href)
-                    seen.add(absu)
-
-        elif tab_key == "7x24":
-            tables = soup.find_all("table", class_="AnonymousHome_home__timeline-live__tb_2kb")
-            for table in tables:
-                for tr in table.find_all("tr"):
-                    tds = tr.find_all("td")
-                    if len(tds) >= 3:
-                        link_tag = tds[2].find("a")
-                        if link_tag and link_tag.get("href"):
-                            seen.add(link_tag["href"])
-
-        elif tab_key == "video":
-            articles = soup.find_all("article", class_="style_timeline__item_3WW")
-            for art in articles:
-                link_tag = art.find("a", href=True)
-                if link_tag:
-                    href = link_tag["href"]
-                    if href and href.count("/") >= 2 and href.strip("/").split("/")[-1].isdigit():
-                        absu = urljoin(HOME_URL, href)
-                        seen.add(absu)
+                    seen.add(urljoin(HOME_URL, href))
+
+            elif tab_key == "7x24":
+                if href:
+                    seen.add(href)
 
         return list(seen)
     # -------------------------------------------------------
     # Parse article page
     # -------------------------------------------------------
-    async def _parse_article(self, context, url: str, tab_key: str) -> Optional[Dict[str, Any]]:
-        page = await context.new_page()
+    async def _parse_article(self, page, url: str, tab_key: str) -> Optional[Dict[str, Any]]:
         try:
             success = await self.safe_goto(page, url, wait="domcontentloaded")
             if not success:
                 return None
 
             html = await page.content()
-            soup = BeautifulSoup(html, "lxml")
-
-            container = soup.select_one("div.article__container") or soup
-            author = author_id = None
-
-            # --- Author ---
-            author_block = container.select_one("div.article__author")
-            if author_block:
-                name_el = author_block.select_one(".name")
-                author = name_el.get_text(strip=True)[:-2] if name_el else None
-                avatar_a = author_block.select_one("a.avatar[href]")
-                if avatar_a:
-                    href = avatar_a.get("href")
-                    if href and href.strip("/").split("/")[0].isdigit():
-                        author_id = href.strip("/").split("/")[0]
-
-            # --- Title ---
-            title_el = container.select_one("h1.article__bd__title")
-            title = title_el.get_text(strip=True) if title_el else None
-
-            # --- Body ---
-            body = container.select_one("div.article__bd__detail")
-            text = body.get_text(separator="\n", strip=True) if body else ""
-            body_html = str(body) if body else ""
-
-            # --- Post Time ---
-            post_time_el = container.select_one("time[datetime]")
-            post_time = None
-            if post_time_el:
-                # Example: <time datetime="2025-11-09T02:16:40.000Z" title="2025-11-09 10:16">2025-11-09 10:16</time>
-                post_time = post_time_el.get("datetime") or post_time_el.get_text(strip=True)
-
-            post_id = url.strip("/").split("/")[-1]
-            text_hash = _hash_text(text)
-
-            json_info = {
-                "id": post_id or text_hash,
-                "url": url,
-                "tab": tab_key,
-                "author": author,
-                "author_id": author_id,
-                "title": title,
-                "text": text,
-                "html": body_html,
-                "symbols": detect_symbols(text),
-                "post_time": post_time,
-                "timestamp": ts(),
-            }
-
-            return json_info
-
+            return (await self.parser.parse(html, url, tab_key))[0]
 
         except Exception as e:
             logger.warning(f"parse error {url}: {e}")
             return None
-        finally:
-            await page.close()
+
+    def _merge_captured(self, tab_key: str, links, captured, truncated_urls) -> set:
+        """Links that still need an article page: scraped links not covered by
+        a complete API record, plus API posts whose text was truncated."""
+        have = {r["id"] for r in captured}
+        todo = {u for u in links if article_key(u) not in have}
+        todo.update(truncated_urls)
+        logger.info(f"[{tab_key}] timeline API: {len(captured)} complete posts, "
+                    f"{len(truncated_urls)} truncated; {len(todo)} article pages still needed")
+        return todo
+
+    def _split_seen(self, links, tab_key: str):
+        if not self.seen_index:
+            return list(links), []
+        fresh, reused = [], []
+        for url in links:
+            if url not in self.seen_index:
+                fresh.append(url)
+            elif self.seen_mode == "copy":
+                rec = self.seen_index.get(url)
+                if rec:
+                    reused.append({**rec, "tab": tab_key})
+        logger.info(f"[{tab_key}] seen-index: {len(fresh)} new, {len(links) - len(fresh)} seen before "
+                    f"({len(reused)} copied)")
+        return fresh, reused
+
+    async def _fetch_article_http(self, url: str, tab_key: str) -> Optional[Dict[str, Any]]:
+        html = await self.http.fetch(url)
+        if not html:
+            return None
+        try:
+            parsed = (await self.parser.parse(html, url, tab_key))[0]
+        except Exception as e:
+            logger.warning(f"[HTTP] parse error {url}: {e}")
+            return None
+        # no body -> page is client-rendered or a login wall; let the browser try
+        return parsed if parsed["text"] else None
+
+    async def _fetch_article(self, url: str, tab_key: str) -> Optional[Dict[str, Any]]:
+        # HTTP fetches bypass context routes, so they can neither be recorded nor replayed
+        if self._tab_opt(tab_key, "fetch", "browser") == "http" and self.archive_mode == "off":
+            parsed = await self._fetch_article_http(url, tab_key)
+            if parsed:
+                self.fetch_counts[tab_key]["http"] += 1
+                return parsed
+            self.fetch_counts[tab_key]["http_fallback"] += 1
+
+        self.fetch_counts[tab_key]["browser"] += 1
+        async with self.pool.page() as page:
+            self.blocker.assign(page, tab_key)
+            parsed = await self._parse_article(page, url, tab_key)
+            # keep the slot busy for a moment so N slots ~ N requests in flight
+            await asyncio.sleep(self.fetch_delay)
+        return parsed
 
     # -------------------------------------------------------
     # Crawl one tab
     # -------------------------------------------------------
     async def crawl_tab(self, context, tab_key: str, tab_label_cn: str, rounds: int) -> Path:
-        page = await context.new_page()
-        await self._goto_tab(page, tab_label_cn)
-        
-        ## ALL except VIDEO
-        if tab_key != "video":
-            all_links = set()
-            for _ in range(rounds):
-                new_links = await self._collect_links(page, tab_key, tab_label_cn)
-                all_links.update(new_links)
-                await self._load_more(page)
-
-            await page.close()
-            results = []
-
-            for i, url in enumerate(all_links):
-                parsed = await self._parse_article(context, url, tab_key)
-                if parsed:
-                    results.append(parsed)
-                await asyncio.sleep(0.2)
-                
-        ## EDIT FOR VIDEO TAB
-        else:
-            results = []
-            html = await page.content()
-            soup = BeautifulSoup(html, "lxml")
-
-            # Each post block
-            video_blocks = soup.select("div.style_timeline__item__main_lHD")
-
-            for block in video_blocks:
-                try:
-                    # --- Author ---
-                    author_tag = block.select_one("a.name_name_3VM.style_user-name_Gwq")
-                    author_name = author_tag.get_text(strip=True) if author_tag else None
-                    author_id = author_tag.get("data-tooltip") if author_tag else None
-
-                    # --- Post Meta (id + time) ---
-                    meta_a = block.select_one("a.style_date-and-source_3r-")
-                    post_href = meta_a.get("href") if meta_a else None
-                    post_id = post_href.strip("/").split("/")[-1] if post_href else None
-                    post_time = meta_a.get_text(strip=True).split("·")[0].replace("修改于", "").strip() if meta_a else None
-
-                    # --- Title ---
-                    title_tag = block.select_one("h3")
-                    title = title_tag.get_text(strip=True) if title_tag else None
-
-                    # --- Video link ---
-                    video_tag = block.select_one("video.vjs-tech")
-                    video_url = video_tag.get("src") if video_tag else None
-
-                    # --- Symbols (optional) ---
-                    symbols = []
-                    for sym in block.select("a[href^='/S/']"):
-                        sym_text = sym.get_text(strip=True)
-                        if sym_text:
-                            symbols.append(sym_text)
-
-                    # --- Assemble record ---
-                    if video_url:
-                        record = {
-                            "post_id": post_id,
-                            "title": title,
-                            "author_name": author_name,
-                            "author_id": author_id,
-                            "post_time": post_time,
-                            "video_url": video_url,
-                            "symbols": symbols,
-                        }
-                        results.append(record)
-                except Exception as e:
-                    logger.warning(f"[VIDEO] parse error: {e}")
-
-            await page.close()
         out_path = self.raw_dir / f"posts_{tab_key}.json"
-        if tab_key == "video":
-            added, total = append_unique_json(out_path, results, unique_keys=("post_id",))
+        ckpt = TabCheckpoint(self.stream_dir, tab_key, blobs=self.blobs)
+        if self.resume and ckpt.finished:
+            logger.info(f"[{tab_key}] already finished in this job; skipping (resume)")
+            return out_path
+
+        if self.resume and ckpt.has_links:
+            logger.info(f"[{tab_key}] resuming: {len(ckpt.pending())}/{len(ckpt.state['links'])} links left")
         else:
-            added, total = append_unique_json(out_path, results)
+            ckpt.reset()
+            await self._collect_tab(tab_key, tab_label_cn, rounds, ckpt)
 
-        logger.info(f"[{tab_key}] collected={len(results)} added={added} total={total} -> {out_path}")
+        ## ALL except VIDEO
+        if tab_key != "video":
+            await self._fetch_pending(tab_key, ckpt)
+
+        # records were streamed to raw/_stream as they were parsed; publish them
+        ckpt.close()
+        # streamed in batches; an empty tab still gets its (empty) record file
+        keys = {"unique_keys": ("post_id",)} if tab_key == "video" else {}
+        collected = added = 0
+        _, total = append_unique_json(out_path, [], **keys)
+        for batch in ckpt.record_batches():
+            n, total = append_unique_json(out_path, batch, **keys)
+            collected += len(batch)
+            added += n
+        ckpt.finish()
+
+        logger.info(f"[{tab_key}] collected={collected} added={added} total={total} -> {out_path}")
+        block = self.blocker.summary(tab_key)
+        self.tab_stats.setdefault(tab_key, {})["blocking"] = block
+        logger.info(f"[{tab_key}] blocking[{block['profile']}]: "
+                    f"blocked {block['requests_blocked']} req (~{block['bytes_blocked_est'] / 1e6:.1f} MB), "
+                    f"allowed {block['requests_allowed']} req ({block['bytes_allowed'] / 1e6:.1f} MB)")
         return out_path
 
+    async def _collect_tab(self, tab_key: str, tab_label_cn: str, rounds: int, ckpt: TabCheckpoint):
+        """Navigate + scroll the tab, then checkpoint the links still to fetch."""
+        # tab pages stay on the home page between tabs; only the first tab on a page pays the cold load
+        async with self.tab_pages.page() as page:
+            self.blocker.assign(page, tab_key)
+            capture = None
+            if self._tab_opt(tab_key, "capture", tab_key in CAPTURE_TABS):
+                capture = TimelineCapture(tab_key)
+                capture.attach(page)
+
+            t_nav = time.perf_counter()
+            warm = await self._home_loaded(page)
+            await self._goto_tab(page, tab_label_cn)
+            nav_sec = time.perf_counter() - t_nav
+            self.tab_stats.setdefault(tab_key, {}).update({"nav_sec": round(nav_sec, 2), "nav_warm": warm})
+            logger.info(f"[{tab_key}] tab navigation {nav_sec:.2f}s ({'in-place switch' if warm else 'cold home load'})")
+
+            if tab_key != "video":
+                all_links = await self._scroll_feed(page, tab_key, rounds)
+                if capture:
+                    await capture.drain()
+            else:
+                html = await page.content()
+            if capture:
+                capture.detach(page)
 
+        ## EDIT FOR VIDEO TAB
+        if tab_key == "video":
+            for r in await self.parser.parse(html, None, tab_key):
+                ckpt.write_record(r)
+            ckpt.start([])
+            return
 
+        captured = []
+        if capture:
+            captured = capture.complete()
+            all_links = self._merge_captured(tab_key, all_links, captured, capture.truncated_urls())
+
+        fresh, reused = self._split_seen(all_links, tab_key)
+        for r in captured:
+            ckpt.write_record(r)
+            if self.seen_index:
+                self.seen_index.add(r["url"], r, self.job_name)
+        for r in reused:
+            ckpt.write_record(r)
+        # written last: once links are checkpointed, a resume goes straight to fetching
+        ckpt.start(fresh)
+
+        self.tab_stats.setdefault(tab_key, {}).update({
+            "links": len(all_links),
+            "seen_before": len(all_links) - len(fresh),
+            "from_api": len(captured),
+        })
+
+    async def _fetch_pending(self, tab_key: str, ckpt: TabCheckpoint):
+        pending = ckpt.pending()
+
+        async def fetch_one(url: str) -> bool:
+            parsed = await self._fetch_article(url, tab_key)
+            if not parsed:
+                return False
+            ckpt.write_record(parsed, url)
+            if self.seen_index:
+                self.seen_index.add(parsed["url"], parsed, self.job_name)
+            return True
+
+        t0 = time.perf_counter()
+        ok = sum(await asyncio.gather(*(fetch_one(url) for url in pending)))
+        if self.seen_index:
+            self.seen_index.flush()
+        elapsed = time.perf_counter() - t0
+        rate = ok / elapsed if elapsed > 0 else 0.0   # failed / skipped fetches are not throughput
+        self.tab_stats.setdefault(tab_key, {}).update({
+            "fetched": ok,
+            "fetch_sec": round(elapsed, 2),
+            "articles_per_sec": round(rate, 2),
+            **self.fetch_counts[tab_key],
+        })
+        logger.info(f"[{tab_key}] fetched {ok}/{len(pending)} new articles in {elapsed:.1f}s "
+                    f"({rate:.2f} articles/sec, concurrency={self.concurrency})")
+
+    def _context_options(self) -> Dict[str, Any]:
+        if self.archive_mode == "replay":
+            return {}
+        # cookies / localStorage from the previous run skip the first-visit handshake
+        opts: Dict[str, Any] = {"storage_state": str(BROWSER_STATE_PATH) if BROWSER_STATE_PATH.exists() else None}
+        if self.archive_mode == "record":
+            ensure_dir(self.archive_path.parent)
+            # .zip HAR with bodies stored as attachments; replayed via route_from_har
+            opts.update(record_har_path=str(self.archive_path), record_har_content="attach", record_har_mode="full")
+        return opts
+
+    async def _save_browser_state(self, context):
+        try:
+            state = await context.storage_state()
+        except Exception as e:
+            logger.warning(f"Could not read browser storage state: {e}")
+            return
+        ensure_dir(BROWSER_STATE_PATH.parent)
+        # write + rename: sharded workers may save at the same time
+        tmp = BROWSER_STATE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(orjson.dumps(state))
+        os.replace(tmp, BROWSER_STATE_PATH)
+
+    async def _start(self, p):
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context(**self._context_options())
+        context.set_default_timeout(60000)
+        context.set_default_navigation_timeout(60000)
+
+        # block what the tab's profile says we never read (see BLOCK_PROFILES)
+        await context.route("**/*", self.blocker.handle)
+        context.on("response", self.blocker.on_response)
+        if self.archive_mode == "replay":
+            # registered last -> takes precedence; anything not in the archive is aborted
+            await context.route_from_har(self.archive_path, not_found="abort")
+
+        # one page pool for all tabs -> concurrency limit is global
+        self.pool = PagePool(context, self.concurrency)
+        self.tab_pages = PagePool(context, self.tab_parallelism)
+        self.parser = ParsePool(self.parse_workers, self.html_backend)
+        self.http = HttpArticleFetcher(context, self.limiter, concurrency=self.concurrency * 2)
+        return browser, context
+
+    async def _stop(self, browser, context):
+        logger.info(f"Rate limiter: {self.limiter.summary()}")
+        if self.archive_mode != "replay":
+            await self._save_browser_state(context)
+        await self.pool.close()
+        await self.tab_pages.close()
+        self.parser.close()
+        await context.close()   # also writes the HAR archive in record mode
+        await browser.close()
+        if self.archive_mode == "record":
+            logger.info(f"Recorded responses -> {self.archive_path}")
 
     # -------------------------------------------------------
     # Parallel master runner 
     # -------------------------------------------------------
-    async def crawl(self, tab_keys: List[str], scroll_rounds: Optional[int] = None):
+    async def crawl(self, tab_keys: List[str], scroll_rounds: Optional[int] = None, resume: Optional[bool] = None):
         rounds = scroll_rounds or self.scroll_rounds
+        if resume is not None:
+            self.resume = resume
         async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            context.set_default_timeout(60000)
-            context.set_default_navigation_timeout(60000)
-
-            # block unnecessary fonts/ads/analytics
-            await context.route("**/*", lambda route: (
-                route.abort()
-                if any(x in route.request.url for x in ["fonts.googleapis.com", "analytics", "ads"])
-                else route.continue_()
-            ))
+            browser, context = await self._start(p)
 
             tasks = []
             for key, lbl in tab_keys:
@@ -362,7 +609,21 @@ class XueqiuBrowserCrawler:
                     logger.error(f"Task {tab} failed: {r}")
                 else:
                     logger.info(f"Task {tab} finished successfully.")
+            if self.blobs:
+                logger.info(f"HTML blobs: {self.blobs.written} written, {self.blobs.deduped} already stored")
 
-            await context.close()
-            await browser.close()
+            await self._stop(browser, context)
             return results
+
+    # -------------------------------------------------------
+    # 7x24 live tail
+    # -------------------------------------------------------
+    async def live_tail(self, tail):
+        async with async_playwright() as p:
+            browser, context = await self._start(p)
+            try:
+                async with self.tab_pages.page() as page:
+                    self.blocker.assign(page, tail.tab_key)
+                    await tail.run(self, page)
+            finally:
+                await self._stop(browser, context)
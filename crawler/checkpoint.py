@@ -0,0 +1,143 @@
+# crawler/checkpoint.py
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import orjson
+
+from utils import ensure_dir
+
+logger = logging.getLogger("crawler.checkpoint")
+
+
+class TabCheckpoint:
+    """Crash-safe progress for one tab of one job, under raw/_stream/:
+
+        posts_{tab}.jsonl        one parsed record per line, appended as parsed
+        done_{tab}.txt           one finished URL per line
+        checkpoint_{tab}.json    {"links": [...], "finished": bool}, rewritten atomically
+
+    Records are flushed line by line, so after a crash at most the line being
+    written is lost: a torn last line is skipped when reading back, and the
+    files are reopened on a fresh line so the next write is not glued onto it.
+    """
+
+    def __init__(self, stream_dir: Path, tab_key: str, blobs=None):
+        ensure_dir(stream_dir)
+        self.tab_key = tab_key
+        # BlobStore: record html is moved out to it before the record is written
+        self.blobs = blobs
+        self.records_path = stream_dir / f"posts_{tab_key}.jsonl"
+        self.done_path = stream_dir / f"done_{tab_key}.txt"
+        self.state_path = stream_dir / f"checkpoint_{tab_key}.json"
+        self.state: Dict[str, Any] = self._load()
+        self._records_fh = None
+        self._done_fh = None
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.state_path.exists():
+            return {}
+        try:
+            return orjson.loads(self.state_path.read_bytes())
+        except orjson.JSONDecodeError:
+            logger.warning(f"[{self.tab_key}] unreadable checkpoint; starting over")
+            return {}
+
+    def _save(self):
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_bytes(orjson.dumps(self.state))
+        os.replace(tmp, self.state_path)
+
+    # ---- state ----
+    @property
+    def finished(self) -> bool:
+        return bool(self.state.get("finished"))
+
+    @property
+    def has_links(self) -> bool:
+        return "links" in self.state
+
+    def done(self) -> Set[str]:
+        if not self.done_path.exists():
+            return set()
+        return {line for line in self.done_path.read_text(encoding="utf-8").splitlines() if line}
+
+    def pending(self) -> List[str]:
+        done = self.done()
+        return [u for u in self.state.get("links", []) if u not in done]
+
+    # ---- writes ----
+    def reset(self):
+        self.close()
+        for p in (self.records_path, self.done_path, self.state_path):
+            p.unlink(missing_ok=True)
+        self.state = {}
+
+    def start(self, links: Iterable[str]):
+        """Record the tab's link list once scrolling is over."""
+        self.state = {"links": sorted(links), "finished": False}
+        self._save()
+
+    def write_record(self, record: Dict[str, Any], url: Optional[str] = None):
+        if self.blobs is not None:
+            self.blobs.stash(record)
+        if self._records_fh is None:
+            self._records_fh = _open_append(self.records_path)
+        self._records_fh.write(orjson.dumps(record) + b"\n")
+        self._records_fh.flush()
+        if url:
+            self.mark_done(url)
+
+    def mark_done(self, url: str):
+        if self._done_fh is None:
+            self._done_fh = _open_append(self.done_path)
+        self._done_fh.write(url.encode("utf-8") + b"\n")
+        self._done_fh.flush()
+
+    def finish(self):
+        self.close()
+        self.state["finished"] = True
+        self._save()
+
+    def close(self):
+        for fh in (self._records_fh, self._done_fh):
+            if fh is not None:
+                fh.close()
+        self._records_fh = self._done_fh = None
+
+    # ---- reads ----
+    def record_batches(self, size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """records() in lists of `size`, so publishing a tab never holds it all in memory."""
+        batch: List[Dict[str, Any]] = []
+        for rec in self.records():
+            batch.append(rec)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        if not self.records_path.exists():
+            return
+        with open(self.records_path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    logger.warning(f"[{self.tab_key}] skipping torn record line")
+
+
+def _open_append(path: Path):
+    f = open(path, "ab+")
+    # a crash mid-line leaves no trailing newline; start on a fresh line
+    # (as datastore/segments._append_lines)
+    if f.tell() > 0:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+    return f
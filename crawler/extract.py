@@ -0,0 +1,208 @@
+# crawler/extract.py
+#
+# Extraction rules for article pages and the video feed, written once against a
+# tiny node interface (select_one / select / text / attr / html) so the HTML
+# backend can be swapped:
+#   "soup"   BeautifulSoup + lxml (reference implementation)
+#   "lexbor" selectolax's Lexbor parser, several times faster; optional dependency
+
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from config import HTML_BACKEND, ts
+from utils import detect_symbols
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional
+    LexborHTMLParser = None
+
+logger = logging.getLogger("crawler.extract")
+
+# Same strings BeautifulSoup leaves out of get_text()
+_NON_TEXT_TAGS = {"script", "style", "template"}
+
+
+def _hash_text(s: str) -> str:
+    return hashlib.sha1((s or "").encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------------
+# Backends
+# -------------------------------------------------------
+class SoupNode:
+    __slots__ = ("el",)
+
+    def __init__(self, el):
+        self.el = el
+
+    def select_one(self, css: str) -> Optional["SoupNode"]:
+        el = self.el.select_one(css)
+        return SoupNode(el) if el is not None else None
+
+    def select(self, css: str) -> List["SoupNode"]:
+        return [SoupNode(el) for el in self.el.select(css)]
+
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        return self.el.get_text(separator=separator, strip=strip)
+
+    def attr(self, name: str) -> Optional[str]:
+        return self.el.get(name)
+
+    def html(self) -> str:
+        return str(self.el)
+
+
+class LexborNode:
+    __slots__ = ("el",)
+
+    def __init__(self, el):
+        self.el = el
+
+    def select_one(self, css: str) -> Optional["LexborNode"]:
+        el = self.el.css_first(css)
+        return LexborNode(el) if el is not None else None
+
+    def select(self, css: str) -> List["LexborNode"]:
+        return [LexborNode(el) for el in self.el.css(css)]
+
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        # walk text nodes ourselves so joining/stripping matches bs4's get_text()
+        parts = []
+        for n in self.el.traverse(include_text=True):
+            if n.tag != "-text" or (n.parent is not None and n.parent.tag in _NON_TEXT_TAGS):
+                continue
+            s = n.text_content or ""
+            if strip:
+                s = s.strip()
+                if not s:
+                    continue
+            parts.append(s)
+        return separator.join(parts)
+
+    def attr(self, name: str) -> Optional[str]:
+        return self.el.attributes.get(name)
+
+    def html(self) -> str:
+        return self.el.html or ""
+
+
+def available_backends() -> List[str]:
+    return ["soup"] + (["lexbor"] if LexborHTMLParser is not None else [])
+
+
+def parse_html(html: str, backend: Optional[str] = None):
+    backend = backend or HTML_BACKEND
+    if backend == "lexbor":
+        if LexborHTMLParser is not None:
+            tree = LexborHTMLParser(html)
+            return LexborNode(tree.root if tree.root is not None else tree.body)
+        logger.warning("selectolax not installed; falling back to BeautifulSoup")
+    return SoupNode(BeautifulSoup(html, "lxml"))
+
+
+# -------------------------------------------------------
+# Rules
+# -------------------------------------------------------
+def extract_article(html: str, url: str, tab_key: str, backend: Optional[str] = None) -> Dict[str, Any]:
+    doc = parse_html(html, backend)
+
+    container = doc.select_one("div.article__container") or doc
+    author = author_id = None
+
+    # --- Author ---
+    author_block = container.select_one("div.article__author")
+    if author_block:
+        name_el = author_block.select_one(".name")
+        author = name_el.text(strip=True)[:-2] if name_el else None
+        avatar_a = author_block.select_one("a.avatar[href]")
+        if avatar_a:
+            href = avatar_a.attr("href")
+            if href and href.strip("/").split("/")[0].isdigit():
+                author_id = href.strip("/").split("/")[0]
+
+    # --- Title ---
+    title_el = container.select_one("h1.article__bd__title")
+    title = title_el.text(strip=True) if title_el else None
+
+    # --- Body ---
+    body = container.select_one("div.article__bd__detail")
+    text = body.text(separator="\n", strip=True) if body else ""
+    body_html = body.html() if body else ""
+
+    # --- Post Time ---
+    post_time_el = container.select_one("time[datetime]")
+    post_time = None
+    if post_time_el:
+        # Example: <time datetime="2025-11-09T02:16:40.000Z" title="2025-11-09 10:16">2025-11-09 10:16</time>
+        post_time = post_time_el.attr("datetime") or post_time_el.text(strip=True)
+
+    post_id = url.strip("/").split("/")[-1]
+    text_hash = _hash_text(text)
+
+    return {
+        "id": post_id or text_hash,
+        "url": url,
+        "tab": tab_key,
+        "author": author,
+        "author_id": author_id,
+        "title": title,
+        "text": text,
+        "html": body_html,
+        "symbols": detect_symbols(text),
+        "post_time": post_time,
+        "timestamp": ts(),
+    }
+
+
+def extract_video_blocks(html: str, backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    doc = parse_html(html, backend)
+    results = []
+
+    # Each post block
+    for block in doc.select("div.style_timeline__item__main_lHD"):
+        try:
+            # --- Author ---
+            author_tag = block.select_one("a.name_name_3VM.style_user-name_Gwq")
+            author_name = author_tag.text(strip=True) if author_tag else None
+            author_id = author_tag.attr("data-tooltip") if author_tag else None
+
+            # --- Post Meta (id + time) ---
+            meta_a = block.select_one("a.style_date-and-source_3r-")
+            post_href = meta_a.attr("href") if meta_a else None
+            post_id = post_href.strip("/").split("/")[-1] if post_href else None
+            post_time = meta_a.text(strip=True).split("·")[0].replace("修改于", "").strip() if meta_a else None
+
+            # --- Title ---
+            title_tag = block.select_one("h3")
+            title = title_tag.text(strip=True) if title_tag else None
+
+            # --- Video link ---
+            video_tag = block.select_one("video.vjs-tech")
+            video_url = video_tag.attr("src") if video_tag else None
+
+            # --- Symbols (optional) ---
+            symbols = []
+            for sym in block.select("a[href^='/S/']"):
+                sym_text = sym.text(strip=True)
+                if sym_text:
+                    symbols.append(sym_text)
+
+            # --- Assemble record ---
+            if video_url:
+                results.append({
+                    "post_id": post_id,
+                    "title": title,
+                    "author_name": author_name,
+                    "author_id": author_id,
+                    "post_time": post_time,
+                    "video_url": video_url,
+                    "symbols": symbols,
+                })
+        except Exception as e:
+            logger.warning(f"[VIDEO] parse error: {e}")
+
+    return results
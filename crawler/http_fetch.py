@@ -0,0 +1,51 @@
+# crawler/http_fetch.py
+
+import asyncio
+import logging
+from typing import Optional
+
+from config import CAPTCHA_MARKERS
+from crawler.rate_limit import HostRateLimiter, THROTTLE_STATUS
+
+logger = logging.getLogger("crawler.http")
+
+HTTP_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+
+
+class HttpArticleFetcher:
+    """Fetch article HTML without rendering it.
+
+    Uses the browser context's APIRequestContext (`context.request`), which
+    shares the context's cookie jar and keeps connections alive between
+    requests, so no page / Chromium renderer is involved.
+    """
+
+    def __init__(self, context, limiter: HostRateLimiter, concurrency: int = 8, timeout_ms: int = 15000):
+        self.request = context.request
+        self.limiter = limiter
+        self.timeout_ms = timeout_ms
+        self._sem = asyncio.Semaphore(concurrency)
+
+    async def fetch(self, url: str) -> Optional[str]:
+        async with self._sem:
+            await self.limiter.acquire(url)
+            try:
+                resp = await self.request.get(url, headers=HTTP_HEADERS, timeout=self.timeout_ms)
+            except Exception as e:
+                self.limiter.on_error(url)
+                logger.warning(f"[HTTP] {url} failed: {e}")
+                return None
+            if resp.status in THROTTLE_STATUS:
+                self.limiter.on_throttle(url, str(resp.status))
+                return None
+            if not resp.ok:
+                logger.warning(f"[HTTP] {url} -> {resp.status}")
+                return None
+            if any(m in resp.url.lower() for m in CAPTCHA_MARKERS):
+                self.limiter.on_throttle(url, "captcha")
+                return None
+            self.limiter.on_success(url)
+            return await resp.text()
@@ -0,0 +1,195 @@
+# crawler/live_tail.py
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from config import TAIL_DEFAULTS, ts
+from utils import append_unique_json, detect_symbols, ensure_dir, read_json_list
+from crawler.api_capture import TimelineCapture
+from crawler.extract import _hash_text
+from crawler.seen_index import article_key
+
+logger = logging.getLogger("crawler.tail")
+HOME_URL = "https://xueqiu.com/"
+LIVE_ROWS = "table.AnonymousHome_home__timeline-live__tb_2kb tr"
+
+# Rows not returned before are tagged data-xq-tail; a reload clears the tags,
+# which is fine because rows are deduped by id in Python as well.
+_NEW_ROWS_JS = """
+(sel) => {
+    const out = [];
+    for (const tr of document.querySelectorAll(sel + ':not([data-xq-tail])')) {
+        tr.setAttribute('data-xq-tail', '1');
+        const tds = tr.querySelectorAll('td');
+        if (tds.length < 3) continue;
+        const a = tds[2].querySelector('a');
+        out.push({
+            time: tds[0].innerText.trim(),
+            href: a ? a.getAttribute('href') : null,
+            text: (a || tds[2]).innerText.trim(),
+        });
+    }
+    return out;
+}
+"""
+
+
+class LiveTail:
+    """Keep the 7x24 tab open and append only rows not seen before.
+
+    Polls the live table every `interval` seconds (and reloads the page every
+    `refresh` seconds in case the feed stops pushing). New items are appended
+    to raw/posts_7x24.json and, with `summarize`, queued for a background task
+    that summarizes them over an AsyncSummarizer into summary/summary_7x24.json
+    (and to the post store, if one is given), so polling never waits for the
+    API. Rows already on the page at the first poll are recorded but not
+    summarized: they are backlog, not live items.
+    """
+
+    def __init__(self, job_dir: Path, tab_label: str = "7x24", tab_key: str = "7x24",
+                 options: Optional[Dict[str, Any]] = None, api_key: Optional[str] = None,
+                 store=None, dedup=None):
+        opts = {**TAIL_DEFAULTS, **(options or {})}
+        self.tab_key = tab_key
+        self.tab_label = tab_label
+        self.interval = opts["interval"]
+        self.refresh = opts["refresh"]
+        self.duration = opts["duration"]
+        self.summarize = opts["summarize"]
+        self.api_key = api_key
+        self.store = store
+        self.dedup = dedup
+        self.job = job_dir.name
+        self.out_path = job_dir / "raw" / f"posts_{tab_key}.json"
+        self.summary_path = job_dir / "summary" / f"summary_{tab_key}.json"
+        ensure_dir(self.out_path.parent)
+        self.seen = {str(r.get("id")) for r in read_json_list(self.out_path)}
+        self.latencies: List[float] = []
+        self.added = 0
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def _records(self, rows: List[Dict[str, Any]], capture: TimelineCapture) -> List[Dict[str, Any]]:
+        out = []
+        for row in rows:
+            url = urljoin(HOME_URL, row["href"]) if row.get("href") else None
+            post_id = article_key(url) if url else _hash_text(row.get("text"))
+            if post_id in self.seen:
+                continue
+            self.seen.add(post_id)
+            # the livenews XHR (if captured) has the exact timestamp and html
+            rec = capture.by_id.get(post_id)
+            if rec:
+                rec = {k: v for k, v in rec.items() if k != "truncated"}
+            else:
+                text = row.get("text") or ""
+                rec = {
+                    "id": post_id,
+                    "url": url,
+                    "tab": self.tab_key,
+                    "author": None,
+                    "author_id": None,
+                    "title": None,
+                    "text": text,
+                    "html": "",
+                    "symbols": detect_symbols(text),
+                    "post_time": row.get("time"),
+                    "timestamp": ts(),
+                }
+            out.append(rec)
+        return out
+
+    async def _summarize(self, summarizer, items: List[Tuple[Dict[str, Any], float]]):
+        # reposts of an item already summarized reuse its summary
+        results = await asyncio.gather(*(summarizer.summarize_clustered(rec, self.dedup, self.job)
+                                         for rec, _ in items))
+        done = [res for res, _ in results if res]
+        if done:
+            ensure_dir(self.summary_path.parent)
+            append_unique_json(self.summary_path, done, unique_keys=("id", "tab"))
+            if self.store:
+                self.store.add_summaries(self.job, done)
+            now = time.monotonic()
+            lats = [now - seen_at for (_, seen_at), (res, _) in zip(items, results) if res]
+            self.latencies.extend(lats)
+            logger.info(f"[tail] summarized {len(done)} new items, {max(lats):.1f}s after they appeared")
+
+    async def _summarize_batch(self, summarizer, items: List[Tuple[Dict[str, Any], float]]):
+        try:
+            await self._summarize(summarizer, items)
+        except Exception as e:
+            logger.error(f"[tail] summarizing {len(items)} items failed: {e}")
+        finally:
+            for _ in items:
+                self.queue.task_done()
+
+    async def _summarize_worker(self):
+        from llm.summarizer import AsyncSummarizer
+
+        # every drained batch gets its own task, so items that arrive while a
+        # batch is in flight do not wait for it (AsyncSummarizer caps requests)
+        tasks = set()
+        async with AsyncSummarizer(self.api_key) as summarizer:
+            try:
+                while True:
+                    items = [await self.queue.get()]
+                    while not self.queue.empty():
+                        items.append(self.queue.get_nowait())
+                    task = asyncio.create_task(self._summarize_batch(summarizer, items))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self, crawler, page):
+        capture = TimelineCapture(self.tab_key)
+        capture.attach(page)
+        await crawler._goto_tab(page, self.tab_label)
+        start = last_refresh = time.monotonic()
+        logger.info(f"[tail] following {self.tab_key}; {len(self.seen)} items already in {self.out_path}")
+        worker = asyncio.create_task(self._summarize_worker()) if self.summarize else None
+        first = True
+
+        try:
+            while self.duration is None or time.monotonic() - start < self.duration:
+                rows = await page.evaluate(_NEW_ROWS_JS, LIVE_ROWS)
+                seen_at = time.monotonic()
+                await capture.drain()
+                new = self._records(rows, capture)
+                if new:
+                    if crawler.blobs:
+                        for rec in new:
+                            crawler.blobs.stash(rec)
+                    _, total = append_unique_json(self.out_path, new)
+                    if self.store:
+                        self.store.add_posts(self.job, new)
+                    self.added += len(new)
+                    if first:
+                        logger.info(f"[tail] +{len(new)} items on the page at start (total {total}), not summarized")
+                    else:
+                        logger.info(f"[tail] +{len(new)} new items (total {total})")
+                        if worker:
+                            for rec in new:
+                                self.queue.put_nowait((rec, seen_at))
+                first = False
+
+                if time.monotonic() - last_refresh >= self.refresh:
+                    if await crawler.safe_goto(page, HOME_URL):
+                        await crawler._goto_tab(page, self.tab_label)
+                    last_refresh = time.monotonic()
+                await asyncio.sleep(self.interval)
+            if worker:
+                await self.queue.join()   # summaries still in flight
+        finally:
+            if worker:
+                worker.cancel()
+                await asyncio.gather(worker, return_exceptions=True)
+            capture.detach(page)
+            avg = sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+            logger.info(f"[tail] stopped: {self.added} new items, "
+                        f"{len(self.latencies)} summarized, avg appear->summary {avg:.1f}s")
@@ -0,0 +1,57 @@
+# crawler/page_pool.py
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List
+
+logger = logging.getLogger("crawler.pool")
+
+
+class PagePool:
+    """Bounded pool of reusable Playwright pages shared by every tab.
+
+    At most `size` pages are open at once; a page is handed back to the pool
+    after each article instead of being closed, so the next article reuses it.
+    """
+
+    def __init__(self, context, size: int = 4):
+        if size < 1:
+            raise ValueError(f"PagePool size must be >= 1, got {size}")
+        self.context = context
+        self.size = size
+        self._sem = asyncio.Semaphore(size)
+        self._idle: List = []
+        self._open = 0
+
+    @asynccontextmanager
+    async def page(self):
+        await self._sem.acquire()
+        page = None
+        try:
+            page = self._idle.pop() if self._idle else await self._new_page()
+            yield page
+        finally:
+            if page is not None:
+                await self._release(page)
+            self._sem.release()
+
+    async def _new_page(self):
+        page = await self.context.new_page()
+        self._open += 1
+        return page
+
+    async def _release(self, page):
+        if page.is_closed():
+            self._open -= 1
+            return
+        self._idle.append(page)
+
+    async def close(self):
+        while self._idle:
+            page = self._idle.pop()
+            try:
+                await page.close()
+            except Exception as e:
+                logger.warning(f"page close failed: {e}")
+            self._open -= 1
@@ -0,0 +1,44 @@
+# crawler/parse_pool.py
+
+import asyncio
+import logging
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from crawler.extract import extract_article, extract_video_blocks
+
+logger = logging.getLogger("crawler.parse")
+
+
+def parse_page(html: str, url: Optional[str], tab_key: str, backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Raw HTML + tab key -> record dicts. Top-level so worker processes can run it."""
+    if tab_key == "video":
+        return extract_video_blocks(html, backend)
+    return [extract_article(html, url, tab_key, backend)]
+
+
+class ParsePool:
+    """Runs parse_page off the event loop.
+
+    workers > 0: a process pool, so parsing scales with cores and never blocks
+    Playwright event handling for the other tabs.
+    workers == 0: parse inline on the loop (old behaviour, handy for debugging).
+    """
+
+    def __init__(self, workers: int = 0, backend: Optional[str] = None):
+        self.workers = workers
+        self.backend = backend
+        # spawn: forking a process that runs the Playwright driver is not safe
+        self._ex = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) if workers > 0 else None
+
+    async def parse(self, html: str, url: Optional[str], tab_key: str) -> List[Dict[str, Any]]:
+        if self._ex is None:
+            return parse_page(html, url, tab_key, self.backend)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._ex, parse_page, html, url, tab_key, self.backend)
+
+    def close(self):
+        if self._ex is not None:
+            self._ex.shutdown(wait=True, cancel_futures=True)
+            self._ex = None
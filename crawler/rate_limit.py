@@ -0,0 +1,102 @@
+# crawler/rate_limit.py
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from config import RATE_LIMIT
+
+logger = logging.getLogger("crawler.rate")
+
+THROTTLE_STATUS = (403, 429)
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+
+class HostRateLimiter:
+    """Per-host token bucket shared by every crawler navigation.
+
+    `rate` requests/sec refill a bucket of `burst` tokens. A throttle signal
+    (429/403, captcha page) halves the host's rate down to `min_rate` and pauses
+    it for a backoff period; every success then adds back 5% of the base rate
+    (AIMD), so the limiter settles just under what the site tolerates.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 min_rate: Optional[float] = None, base_backoff: Optional[float] = None,
+                 max_backoff: Optional[float] = None):
+        self.base_rate = rate or RATE_LIMIT["rate"]
+        self.burst = burst or RATE_LIMIT["burst"]
+        self.min_rate = min_rate or RATE_LIMIT["min_rate"]
+        self.base_backoff = base_backoff or RATE_LIMIT["base_backoff"]
+        self.max_backoff = max_backoff or RATE_LIMIT["max_backoff"]
+        self._buckets: Dict[str, _Bucket] = {}
+        self.events: Counter = Counter()      # "429", "403", "captcha", "error"
+        self.requests: Counter = Counter()    # host -> acquired tokens
+        self.waited_sec = 0.0
+
+    def _bucket(self, url: str) -> _Bucket:
+        host = urlparse(url).hostname or ""
+        if host not in self._buckets:
+            self._buckets[host] = _Bucket(self.base_rate, self.burst)
+        return self._buckets[host]
+
+    async def acquire(self, url: str):
+        b = self._bucket(url)
+        async with b.lock:
+            while True:
+                now = time.monotonic()
+                if now < b.paused_until:
+                    wait = b.paused_until - now
+                else:
+                    b.tokens = min(self.burst, b.tokens + (now - b.last) * b.rate)
+                    b.last = now
+                    if b.tokens >= 1:
+                        b.tokens -= 1
+                        self.requests[urlparse(url).hostname or ""] += 1
+                        return
+                    wait = (1 - b.tokens) / b.rate
+                self.waited_sec += wait
+                await asyncio.sleep(wait)
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for retry `attempt` (0-based)."""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def on_success(self, url: str):
+        b = self._bucket(url)
+        b.rate = min(self.base_rate, b.rate + 0.05 * self.base_rate)
+
+    def on_throttle(self, url: str, reason: str, attempt: int = 0):
+        b = self._bucket(url)
+        b.rate = max(self.min_rate, b.rate / 2)
+        b.tokens = 0
+        pause = max(self.base_backoff, self.backoff(attempt + 1))
+        b.paused_until = max(b.paused_until, time.monotonic() + pause)
+        self.events[reason] += 1
+        logger.warning(f"[Throttle] {reason} from {urlparse(url).hostname}; "
+                       f"rate -> {b.rate:.2f}/s, pausing {pause:.1f}s")
+
+    def on_error(self, url: str):
+        self.events["error"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "base_rate": self.base_rate,
+            "burst": self.burst,
+            "current_rate": {h: round(b.rate, 2) for h, b in self._buckets.items()},
+            "requests": dict(self.requests),
+            "throttle_events": dict(self.events),
+            "waited_sec": round(self.waited_sec, 1),
+        }
@@ -0,0 +1,110 @@
+# crawler/seen_index.py
+
+import hashlib
+import logging
+import math
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import orjson
+
+from config import ts
+from utils import ensure_dir
+
+logger = logging.getLogger("crawler.seen")
+
+
+def article_key(url: str) -> str:
+    """Post id for article URLs (https://xueqiu.com/<uid>/<pid>), else the URL."""
+    last = (url or "").split("?")[0].strip("/").split("/")[-1]
+    return last if last.isdigit() else url
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over a bytearray (double hashing on blake2b)."""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.m = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _positions(self, key: str):
+        h = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(h[:8], "little")
+        h2 = int.from_bytes(h[8:], "little") | 1
+        return ((h1 + i * h2) % self.m for i in range(self.k))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenIndex:
+    """Cross-job index of parsed articles.
+
+    A Bloom filter (`seen.bloom`) answers most "never seen" lookups in memory;
+    hits are confirmed in SQLite (`seen.sqlite3`), which also keeps the last
+    parsed record so a later job can copy it instead of re-fetching.
+    """
+
+    def __init__(self, root: Path, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.root = root
+        ensure_dir(root)
+        # WAL + busy timeout: sharded crawler processes write to the same index.
+        # Autocommit, so each add() holds the write lock only for its own insert
+        # instead of until flush() at the end of the tab.
+        self.db = sqlite3.connect(root / "seen.sqlite3", timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " key TEXT PRIMARY KEY, url TEXT, job TEXT, tab TEXT, seen_at TEXT, record BLOB)"
+        )
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.bloom_path = root / "seen.bloom"
+        self._load_bloom()
+
+    def _load_bloom(self):
+        if self.bloom_path.exists() and self.bloom_path.stat().st_size == len(self.bloom.bits):
+            self.bloom.bits = bytearray(self.bloom_path.read_bytes())
+            return
+        # missing or resized filter: rebuild from the exact store
+        n = 0
+        for (key,) in self.db.execute("SELECT key FROM seen"):
+            self.bloom.add(key)
+            n += 1
+        if n:
+            logger.info(f"Rebuilt seen-index bloom filter from {n} keys")
+
+    def __contains__(self, url: str) -> bool:
+        key = article_key(url)
+        if key not in self.bloom:
+            return False
+        return self.db.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone() is not None
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        row = self.db.execute("SELECT record FROM seen WHERE key = ?", (article_key(url),)).fetchone()
+        return orjson.loads(row[0]) if row and row[0] else None
+
+    def add(self, url: str, record: Dict[str, Any], job: str):
+        key = article_key(url)
+        self.bloom.add(key)
+        self.db.execute(
+            "INSERT OR REPLACE INTO seen (key, url, job, tab, seen_at, record) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, url, job, record.get("tab"), ts(), orjson.dumps(record)),
+        )
+
+    def flush(self):
+        # OR with the on-disk filter so concurrent crawler processes do not drop each other's keys
+        if self.bloom_path.exists() and self.bloom_path.stat().st_size == len(self.bloom.bits):
+            n = len(self.bloom.bits)
+            merged = int.from_bytes(self.bloom.bits, "little") | int.from_bytes(self.bloom_path.read_bytes(), "little")
+            self.bloom.bits = bytearray(merged.to_bytes(n, "little"))
+        self.bloom_path.write_bytes(bytes(self.bloom.bits))
+
+    def close(self):
+        self.flush()
+        self.db.close()
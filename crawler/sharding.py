@@ -0,0 +1,115 @@
+# crawler/sharding.py
+
+import asyncio
+import logging
+import multiprocessing as mp
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import RATE_LIMIT, SEEN_INDEX_ROOT
+from crawler.checkpoint import TabCheckpoint
+from utils import append_unique_json, read_json_list
+
+logger = logging.getLogger("crawler.shard")
+
+
+def shard_tabs(tab_keys: List[Tuple[str, str]], workers: int) -> List[List[Tuple[str, str]]]:
+    """Round-robin tabs over `workers` shards (same input -> same shards)."""
+    shards = [tab_keys[i::workers] for i in range(workers)]
+    return [s for s in shards if s]
+
+
+def split_rate_limit(rate_limit: Optional[Dict[str, Any]], workers: int) -> Dict[str, Any]:
+    """Per-worker share of the rate limit, so N processes together stay at `rate` / `burst`.
+
+    Each worker has its own HostRateLimiter; a throttle seen by one worker only
+    slows that worker, the others keep their (already reduced) share.
+    """
+    opts = {**RATE_LIMIT, **(rate_limit or {})}
+    return {**opts,
+            "rate": opts["rate"] / workers,
+            "burst": max(1.0, opts["burst"] / workers),
+            "min_rate": opts["min_rate"] / workers}
+
+
+def _run_shard(shard_dir: Path, job_name: str, tabs: List[Tuple[str, str]],
+               scroll_rounds: int, crawler_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    # Runs in a worker process with its own event loop and Chromium.
+    from crawler.browser_crawler import XueqiuBrowserCrawler
+    from crawler.seen_index import SeenIndex
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    kwargs = dict(crawler_kwargs)
+    seen_mode = kwargs.get("seen_mode", "off")
+    seen_index = SeenIndex(SEEN_INDEX_ROOT) if seen_mode in ("skip", "copy") else None
+    crawler = XueqiuBrowserCrawler(shard_dir, scroll_rounds=scroll_rounds, seen_index=seen_index,
+                                   job_name=job_name, **kwargs)
+    try:
+        asyncio.run(crawler.crawl(tabs))
+    finally:
+        if seen_index:
+            seen_index.close()
+    return crawler.tab_stats
+
+
+def merge_shards(raw_dir: Path, shard_dirs: List[Path], tab_keys: List[Tuple[str, str]]):
+    """Merge shard outputs into raw_dir/posts_{tab}.json.
+
+    Records are sorted by post id before appending, so the merged file does not
+    depend on which worker finished first.
+    """
+    for key, _ in tab_keys:
+        id_field = "post_id" if key == "video" else "id"
+        records = []
+        for d in shard_dirs:
+            records.extend(read_json_list(d / f"posts_{key}.json"))
+        if not records:
+            continue
+        records.sort(key=lambda r: str(r.get(id_field) or ""))
+        out_path = raw_dir / f"posts_{key}.json"
+        if key == "video":
+            added, total = append_unique_json(out_path, records, unique_keys=("post_id",))
+        else:
+            added, total = append_unique_json(out_path, records)
+        logger.info(f"[{key}] merged {len(records)} from shards, added={added} total={total} -> {out_path}")
+
+
+def crawl_sharded(raw_dir: Path, tab_keys: List[Tuple[str, str]], workers: int,
+                  scroll_rounds: int, crawler_kwargs: Optional[Dict[str, Any]] = None,
+                  keep_shards: bool = False) -> Dict[str, Any]:
+    """Crawl tabs in `workers` processes, one browser each, then merge per-tab outputs."""
+    shards = shard_tabs(tab_keys, workers)
+    shard_root = raw_dir / "_shards"
+    shard_dirs = [shard_root / f"shard_{i}" for i in range(len(shards))]
+    job_name = raw_dir.parent.name
+    crawler_kwargs = dict(crawler_kwargs or {})
+    crawler_kwargs["rate_limit"] = split_rate_limit(crawler_kwargs.get("rate_limit"), len(shards))
+    logger.info(f"{len(shards)} workers, {crawler_kwargs['rate_limit']['rate']:.2f} req/s each")
+
+    tab_stats: Dict[str, Any] = {}
+    failed = 0
+    # spawn: Playwright's driver and asyncio loops do not survive fork
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=mp.get_context("spawn")) as ex:
+        futures = [
+            ex.submit(_run_shard, d, job_name, tabs, scroll_rounds, crawler_kwargs)
+            for d, tabs in zip(shard_dirs, shards)
+        ]
+        for d, tabs, fut in zip(shard_dirs, shards, futures):
+            try:
+                tab_stats.update(fut.result())
+            except Exception as e:
+                logger.error(f"Shard {d.name} ({[k for k, _ in tabs]}) failed: {e}")
+                failed += 1
+
+    merge_shards(raw_dir, shard_dirs, tab_keys)
+    # unfinished shards keep their raw/_shards/*/_stream checkpoints for resume
+    unfinished = [k for d, tabs in zip(shard_dirs, shards) for k, _ in tabs
+                  if not TabCheckpoint(d / "_stream", k).finished]
+    if unfinished:
+        logger.warning(f"Unfinished tabs {unfinished}; keeping {shard_root} for resume")
+    if not keep_shards and not failed and not unfinished:
+        shutil.rmtree(shard_root, ignore_errors=True)
+    return tab_stats
@@ -0,0 +1,85 @@
+# datastore/blobs.py
+
+import hashlib
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import BLOB_ROOT
+
+logger = logging.getLogger("datastore.blobs")
+
+
+class BlobStore:
+    """Compressed, content-addressed store for post HTML bodies.
+
+        _blobs/3f/3f9a...e1.z      zlib(utf-8 html), named by sha256 of the html
+
+    A body is written once however many tabs / jobs contain it. `stash()` moves
+    a record's "html" into the store and leaves "html_hash"; `html()` resolves
+    it again for the few consumers that need the markup.
+    """
+
+    def __init__(self, root: Path = BLOB_ROOT, level: int = 6):
+        self.root = root
+        self.level = level
+        self.written = 0
+        self.deduped = 0
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.z"
+
+    def put(self, html: str) -> str:
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            self.deduped += 1
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # unique tmp name: sharded crawler processes may write the same body at once
+        tmp = path.with_name(f"{digest}.{os.getpid()}.tmp")
+        tmp.write_bytes(zlib.compress(data, self.level))
+        os.replace(tmp, path)
+        self.written += 1
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        try:
+            return zlib.decompress(self._path(digest).read_bytes()).decode("utf-8")
+        except FileNotFoundError:
+            logger.warning(f"Missing html blob {digest}")
+            return None
+
+    def __contains__(self, digest: str) -> bool:
+        return self._path(digest).exists()
+
+    def stash(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace record["html"] by record["html_hash"] (in place; empty html is just dropped)."""
+        html = record.pop("html", None)
+        if html:
+            record["html_hash"] = self.put(html)
+        return record
+
+    def html(self, record: Dict[str, Any]) -> str:
+        if record.get("html"):
+            return record["html"]
+        digest = record.get("html_hash")
+        return (self.get(digest) or "") if digest else ""
+
+
+_default: Optional[BlobStore] = None
+
+
+def record_html(record: Dict[str, Any]) -> str:
+    """HTML of a record, inline or from the default blob store (loaded only when called)."""
+    global _default
+    if record.get("html"):
+        return record["html"]
+    if not record.get("html_hash"):
+        return ""
+    if _default is None:
+        _default = BlobStore()
+    return _default.html(record)
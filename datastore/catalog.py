@@ -0,0 +1,281 @@
+# datastore/catalog.py
+
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from config import CATALOG_PATH, COMPACTED_ROOT, RETENTION, STORAGE_ROOT, ts
+from datastore.segments import SegmentStore, record_time, segment_dir
+from utils import append_unique_json, list_record_files, read_json_list
+
+logger = logging.getLogger("datastore.catalog")
+
+MANIFEST = "manifest.json"
+
+
+def _write_json(path: Path, data: Any):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    try:
+        return orjson.loads(path.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
+
+
+def _job_created(job_dir: Path) -> str:
+    # run_YYYYMMDD_HHMMSS (default_jobname) or, for named jobs, the folder's mtime
+    try:
+        dt = datetime.strptime(job_dir.name[4:], "%Y%m%d_%H%M%S").astimezone()
+    except ValueError:
+        dt = datetime.fromtimestamp(job_dir.stat().st_mtime).astimezone()
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _dir_bytes(p: Path) -> int:
+    return sum(f.stat().st_size for f in p.rglob("*") if f.is_file()) if p.is_dir() else 0
+
+
+def _count_and_range(path: Path):
+    """(record count, [first, last] record time or None) of a record file.
+
+    Segment stores answer from their key index and manifest without decoding
+    records; JSON array files (STORAGE_FORMAT "json") are read.
+    """
+    if segment_dir(path).is_dir():
+        store = SegmentStore(segment_dir(path))
+        return store.count(), store.time_range()
+    recs = read_json_list(path)
+    times = [t for t in map(record_time, recs) if t]
+    return len(recs), ([min(times), max(times)] if times else None)
+
+
+def _unique_keys(tab: str):
+    return ("post_id",) if tab == "video" else ("id", "tab")
+
+
+class JobCatalog:
+    """Per-job manifests plus a global index of every job under STORAGE_ROOT.
+
+        storage/<job>/manifest.json      tabs (posts / summaries), time range, stage
+                                         status, sizes, retention / compaction state
+        storage/_index/catalog.json      {job: manifest} for every job
+
+    Manifests are refreshed by main.py after each stage, so finding "jobs that
+    crawled etf last week" reads one file instead of walking every job.
+    """
+
+    def __init__(self, root: Path = STORAGE_ROOT, index_path: Path = CATALOG_PATH,
+                 compacted_root: Path = COMPACTED_ROOT):
+        self.root = root
+        self.index_path = index_path
+        self.compacted_root = compacted_root
+        self.index: Dict[str, Dict[str, Any]] = _read_json(index_path)
+
+    def _save_index(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_json(self.index_path, self.index)
+
+    def job_dirs(self) -> List[Path]:
+        return sorted(p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith("_"))
+
+    # ---- manifests ----
+    def manifest(self, job_dir: Path) -> Dict[str, Any]:
+        return _read_json(job_dir / MANIFEST)
+
+    def scan(self, job_dir: Path) -> Dict[str, Any]:
+        """Recount a job's tabs / time range / sizes and save its manifest + index entry."""
+        m = self.manifest(job_dir)
+        m.setdefault("job", job_dir.name)
+        m.setdefault("created_at", _job_created(job_dir))
+        m.setdefault("stages", {})
+        tabs: Dict[str, Dict[str, int]] = {}
+        first = last = None
+        raw_dir, summary_dir = job_dir / "raw", job_dir / "summary"
+        if raw_dir.is_dir():
+            for f in list_record_files(raw_dir, "posts_*"):
+                n, rng = _count_and_range(f)
+                tabs.setdefault(f.stem[len("posts_"):], {})["posts"] = n
+                if rng:
+                    first = rng[0] if first is None or rng[0] < first else first
+                    last = rng[1] if last is None or rng[1] > last else last
+        elif "tabs" in m:
+            # raw removed by retention: keep the counts recorded before
+            tabs = {k: {"posts": v.get("posts", 0)} for k, v in m["tabs"].items()}
+            first, last = (m.get("time_range") or {}).get("first"), (m.get("time_range") or {}).get("last")
+        if summary_dir.is_dir():
+            for f in list_record_files(summary_dir, "summary_*"):
+                tabs.setdefault(f.stem[len("summary_"):], {})["summaries"] = _count_and_range(f)[0]
+        m["tabs"] = tabs
+        m["time_range"] = {"first": first, "last": last}
+        m["bytes"] = {"raw": _dir_bytes(raw_dir), "summary": _dir_bytes(summary_dir),
+                      "reports": _dir_bytes(job_dir / "reports")}
+        m["raw"] = "present" if raw_dir.is_dir() else m.get("raw", "missing")
+        m["updated_at"] = ts()
+        _write_json(job_dir / MANIFEST, m)
+        self.index[job_dir.name] = m
+        self._save_index()
+        return m
+
+    def set_stage(self, job_dir: Path, stage: str, status: str, rescan: bool = False):
+        """Record a stage's status ("running" left behind means the run was interrupted)."""
+        m = self.manifest(job_dir)
+        m.setdefault("job", job_dir.name)
+        m.setdefault("created_at", _job_created(job_dir))
+        m.setdefault("stages", {})[stage] = {"status": status, "at": ts()}
+        _write_json(job_dir / MANIFEST, m)
+        if rescan:
+            self.scan(job_dir)
+        else:
+            self.index[job_dir.name] = m
+            self._save_index()
+
+    def rebuild(self) -> int:
+        self.index = {}
+        for d in self.job_dirs():
+            self.scan(d)
+        return len(self.index)
+
+    # ---- queries ----
+    def find(self, tab: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+             stage: Optional[str] = None) -> List[str]:
+        """Jobs with posts in `tab`, created in [since, until] (ISO), whose `stage` is done."""
+        out = []
+        for job, m in sorted(self.index.items()):
+            if tab and not (m.get("tabs") or {}).get(tab, {}).get("posts"):
+                continue
+            created = m.get("created_at") or ""
+            if (since and created < since) or (until and created > until):
+                continue
+            if stage and (m.get("stages") or {}).get(stage, {}).get("status") != "done":
+                continue
+            out.append(job)
+        return out
+
+    # ---- compaction / retention ----
+    def _older_than(self, days: Optional[float], now: Optional[datetime] = None) -> List[Path]:
+        if days is None:
+            return []
+        cutoff = ((now or datetime.now(timezone.utc)) - timedelta(days=days)).isoformat()
+        return [d for d in self.job_dirs() if (self.manifest(d).get("created_at") or _job_created(d)) < cutoff]
+
+    def compact(self, older_than_days: float, now: Optional[datetime] = None,
+                dry_run: bool = False) -> Dict[str, int]:
+        """Merge raw posts + summaries of old jobs into deduplicated monthly archives.
+
+            storage/_compacted/<YYYY-MM>/raw/posts_<tab>.seg        unique by (id, tab)
+            storage/_compacted/<YYYY-MM>/summary/summary_<tab>.seg
+
+        Each record gains a "job" field (first job that had it); the archives are
+        segment stores, so utils.read_json_list / the report read them as-is.
+        """
+        counts = {"jobs": 0, "posts_added": 0, "summaries_added": 0}
+        for job_dir in self._older_than(older_than_days, now):
+            m = self.manifest(job_dir) or self.scan(job_dir)
+            if m.get("compacted_into") or not (job_dir / "raw").is_dir():
+                continue
+            month = (m.get("created_at") or _job_created(job_dir))[:7]
+            dest = self.compacted_root / month
+            logger.info(f"[compact] {job_dir.name} -> {dest}{' (dry run)' if dry_run else ''}")
+            counts["jobs"] += 1
+            if dry_run:
+                continue
+            for sub, prefix, key in (("raw", "posts_", "posts_added"), ("summary", "summary_", "summaries_added")):
+                if not (job_dir / sub).is_dir():
+                    continue
+                for f in list_record_files(job_dir / sub, prefix + "*"):
+                    tab = f.stem[len(prefix):]
+                    recs = [{**r, "job": r.get("job") or job_dir.name} for r in read_json_list(f)]
+                    (dest / sub).mkdir(parents=True, exist_ok=True)
+                    added, _ = append_unique_json(dest / sub / f.name, recs,
+                                                  unique_keys=_unique_keys(tab) if sub == "raw" else ("id", "tab"))
+                    counts[key] += added
+            m["compacted_into"] = str(dest)
+            m["compacted_at"] = ts()
+            _write_json(job_dir / MANIFEST, m)
+            self.index[job_dir.name] = m
+        self._save_index()
+        return counts
+
+    def retain(self, policy: Optional[Dict[str, Any]] = None, now: Optional[datetime] = None,
+               dry_run: bool = False, force: bool = False) -> Dict[str, List[str]]:
+        """Apply RETENTION: drop raw/ (and summary/, reports/ if configured) of old jobs.
+
+        Raw data is only dropped once the job has been compacted, unless `force`.
+        None for a *_days entry keeps that data forever.
+        """
+        policy = {**RETENTION, **(policy or {})}
+        removed: Dict[str, List[str]] = {"raw": [], "summary": [], "reports": [], "skipped": []}
+        for part in ("raw", "summary", "reports"):
+            for job_dir in self._older_than(policy.get(f"{part}_days"), now):
+                target = job_dir / part
+                if not target.is_dir():
+                    continue
+                m = self.manifest(job_dir) or self.scan(job_dir)
+                if part == "raw" and not m.get("compacted_into") and not force:
+                    removed["skipped"].append(job_dir.name)
+                    continue
+                removed[part].append(job_dir.name)
+                if dry_run:
+                    continue
+                if part == "raw":
+                    self.scan(job_dir)   # freeze counts / time range before the data goes
+                shutil.rmtree(target)
+                m = self.manifest(job_dir)
+                m[part] = "deleted"
+                m[f"{part}_deleted_at"] = ts()
+                _write_json(job_dir / MANIFEST, m)
+                self.index[job_dir.name] = m
+        if removed["skipped"]:
+            logger.warning(f"[retain] kept raw of {len(removed['skipped'])} uncompacted jobs "
+                           f"(run compact first, or --force): {removed['skipped']}")
+        self._save_index()
+        return removed
+
+
+def main():
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Job catalog, retention and compaction for STORAGE_ROOT")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("index", help="rescan every job and rebuild storage/_index/catalog.json")
+    f = sub.add_parser("find", help="list jobs")
+    f.add_argument("--tab")
+    f.add_argument("--since", help="ISO date, e.g. 2025-11-01")
+    f.add_argument("--until")
+    f.add_argument("--stage", help="only jobs where this stage is done (crawl, summarize, report, export)")
+    c = sub.add_parser("compact", help="merge old jobs into storage/_compacted/<YYYY-MM>")
+    c.add_argument("--older-than", type=float, default=RETENTION["raw_days"], help="days")
+    c.add_argument("--dry-run", action="store_true")
+    r = sub.add_parser("retain", help="apply the RETENTION policy from config.py")
+    r.add_argument("--raw-days", type=float)
+    r.add_argument("--dry-run", action="store_true")
+    r.add_argument("--force", action="store_true", help="drop raw even if the job was not compacted")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    cat = JobCatalog()
+    if args.cmd == "index":
+        print(f"{cat.rebuild()} jobs indexed -> {cat.index_path}")
+    elif args.cmd == "find":
+        for job in cat.find(args.tab, args.since, args.until, args.stage):
+            m = cat.index[job]
+            tabs = ", ".join(f"{k}:{v.get('posts', 0)}" for k, v in sorted((m.get("tabs") or {}).items()))
+            print(f"{job}  {m.get('created_at', '')[:19]}  raw={m.get('raw', '?')}  {tabs}")
+    elif args.cmd == "compact":
+        print(cat.compact(args.older_than, dry_run=args.dry_run))
+    else:
+        policy = {"raw_days": args.raw_days} if args.raw_days is not None else None
+        print(cat.retain(policy, dry_run=args.dry_run, force=args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# datastore/columnar.py
+
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+
+from datastore.blobs import record_html
+from utils import list_record_files, read_json_list
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow.fs import LocalFileSystem
+except ImportError:  # optional
+    pa = None
+
+logger = logging.getLogger("datastore.columnar")
+
+# Column layout per dataset; anything else in a record goes to `extra` (JSON).
+# html lives in its own dataset so loading posts never touches it. `seq` is the
+# record's position in the job's export, so reads can restore file order.
+_LIST = "list"
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    "posts": {"job": "str", "seq": "int", "tab": "str", "id": "str", "url": "str", "author": "str", "author_id": "str",
+              "title": "str", "text": "str", "text_hash": "str", "symbols": _LIST,
+              "post_time": "str", "timestamp": "str", "extra": "str"},
+    "html": {"job": "str", "tab": "str", "id": "str", "html": "str"},
+    "summaries": {"job": "str", "seq": "int", "tab": "str", "id": "str", "summary": "str", "sentiment": "str",
+                  "themes": _LIST, "entities": _LIST, "extra": "str"},
+}
+UNKNOWN_DATE = "unknown"
+
+
+def _require():
+    if pa is None:
+        raise RuntimeError("columnar export needs pyarrow (pip install pyarrow)")
+
+
+def _arrow_schema(kind: str):
+    types = {"str": pa.string(), "int": pa.int64(), _LIST: pa.list_(pa.string())}
+    return pa.schema([(c, types[t]) for c, t in SCHEMAS[kind].items()])
+
+
+def _dataset_schema(kind: str):
+    # files hold the SCHEMAS columns; `date` comes from the partition path
+    return _arrow_schema(kind).append(pa.field("date", pa.string()))
+
+
+def _post_date(rec: Dict[str, Any]) -> str:
+    for k in ("post_time", "timestamp"):
+        v = rec.get(k)
+        if isinstance(v, str) and len(v) >= 10 and v[4] == "-" and v[7] == "-":
+            return v[:10]
+    return UNKNOWN_DATE
+
+
+def _str(v) -> Optional[str]:
+    return None if v is None else str(v)
+
+
+def _row(kind: str, job: str, seq: int, rec: Dict[str, Any]) -> Dict[str, Any]:
+    cols = SCHEMAS[kind]
+    row: Dict[str, Any] = {"job": job, "seq": seq}
+    for c, t in cols.items():
+        if c in ("job", "seq", "extra"):
+            continue
+        v = rec.get(c)
+        if c == "id" and v is None:
+            v = rec.get("post_id")
+        row[c] = [str(x) for x in v] if t == _LIST and v else ([] if t == _LIST else _str(v))
+    if "extra" in cols:
+        rest = {k: v for k, v in rec.items() if k not in cols and k not in ("html", "html_hash")}
+        row["extra"] = orjson.dumps(rest, option=orjson.OPT_NON_STR_KEYS).decode() if rest else None
+    return row
+
+
+class ColumnarExport:
+    """Partitioned Parquet copy of job data for analysis.
+
+        <root>/posts/date=2025-11-08/tab=hot/<job>.parquet
+        <root>/html/date=2025-11-08/tab=hot/<job>.parquet       (job, tab, id, html)
+        <root>/summaries/date=2025-11-08/tab=hot/<job>.parquet
+
+    One file per job and partition, so re-exporting a job replaces only its
+    own files. Summaries are partitioned by the date of the post they describe.
+    Reads memory-map the files and decode only the requested columns.
+    """
+
+    def __init__(self, root: Path, compression: str = "zstd"):
+        _require()
+        self.root = root
+        self.compression = compression
+        self.fs = LocalFileSystem(use_mmap=True)
+
+    # ---- write ----
+    def _write(self, kind: str, job: str, rows_by_part: Dict[tuple, List[Dict[str, Any]]]) -> int:
+        for old in (self.root / kind).glob(f"date=*/tab=*/{job}.parquet"):
+            old.unlink()
+        schema = _arrow_schema(kind)
+        n = 0
+        for (date, tab), rows in rows_by_part.items():
+            part = self.root / kind / f"date={date}" / f"tab={tab}"
+            part.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pylist(rows, schema=schema)
+            pq.write_table(table, part / f"{job}.parquet", compression=self.compression)
+            n += len(rows)
+        return n
+
+    def export_records(self, job: str, posts: Iterable[Dict[str, Any]],
+                       summaries: Iterable[Dict[str, Any]] = ()) -> Dict[str, int]:
+        post_rows, html_rows, sum_rows = defaultdict(list), defaultdict(list), defaultdict(list)
+        date_by_id: Dict[str, str] = {}
+        for seq, rec in enumerate(posts):
+            row = _row("posts", job, seq, rec)
+            row["tab"] = row["tab"] or "none"
+            part = (_post_date(rec), row["tab"])
+            date_by_id[row["id"]] = part[0]
+            post_rows[part].append(row)
+            html = record_html(rec)
+            if html:
+                html_rows[part].append({"job": job, "tab": row["tab"], "id": row["id"], "html": html})
+        for seq, rec in enumerate(summaries):
+            row = _row("summaries", job, seq, rec)
+            row["tab"] = row["tab"] or "none"
+            sum_rows[(date_by_id.get(row["id"], UNKNOWN_DATE), row["tab"])].append(row)
+        counts = {
+            "posts": self._write("posts", job, post_rows),
+            "html": self._write("html", job, html_rows),
+            "summaries": self._write("summaries", job, sum_rows),
+        }
+        logger.info(f"Exported {job} -> {self.root}: {counts}")
+        return counts
+
+    def export_job(self, job_dir: Path, job: Optional[str] = None) -> Dict[str, int]:
+        """Export a job folder's raw/ and summary/ record files (JSON or segmented)."""
+        posts = [r for f in list_record_files(job_dir / "raw") for r in read_json_list(f)]
+        summaries = []
+        if (job_dir / "summary").is_dir():
+            summaries = [r for f in list_record_files(job_dir / "summary") for r in read_json_list(f)]
+        return self.export_records(job or job_dir.name, posts, summaries)
+
+    # ---- read ----
+    def dataset(self, kind: str = "posts"):
+        # `tab` is both a file column and a partition key; `date` exists only in the path
+        parts = ds.partitioning(pa.schema([("date", pa.string()), ("tab", pa.string())]), flavor="hive")
+        return ds.dataset(str(self.root / kind), filesystem=self.fs, format="parquet", partitioning=parts,
+                          schema=_dataset_schema(kind))
+
+    def has_job(self, job: str, kind: str = "summaries") -> bool:
+        return any((self.root / kind).glob(f"date=*/tab=*/{job}.parquet"))
+
+    def read_table(self, kind: str = "posts", columns: Optional[Sequence[str]] = None,
+                   jobs: Optional[Sequence[str]] = None, tabs: Optional[Sequence[str]] = None,
+                   dates: Optional[Sequence[str]] = None, ids: Optional[Sequence[str]] = None):
+        """Arrow table of `kind` with only `columns`; filters prune partitions/row groups."""
+        if not (self.root / kind).is_dir():
+            empty = _dataset_schema(kind).empty_table()
+            return empty.select(list(columns)) if columns else empty
+        expr = None
+        for col, vals in (("job", jobs), ("tab", tabs), ("date", dates), ("id", ids)):
+            if vals is not None:
+                e = ds.field(col).isin([str(v) for v in vals])
+                expr = e if expr is None else expr & e
+        return self.dataset(kind).to_table(columns=list(columns) if columns else None, filter=expr)
+
+    def read_records(self, kind: str = "posts", columns: Optional[Sequence[str]] = None,
+                     **filters) -> List[Dict[str, Any]]:
+        """Like read_table, as record dicts in export order (`extra` merged back in)."""
+        cols = list(columns) if columns else None
+        if cols and kind != "html":
+            cols += [c for c in ("job", "seq") if c not in cols]
+        table = self.read_table(kind, cols, **filters)
+        if kind != "html":
+            table = table.sort_by([("job", "ascending"), ("seq", "ascending")])
+        out = []
+        for row in table.to_pylist():
+            extra = row.pop("extra", None)
+            if extra:
+                row.update(orjson.loads(extra))
+            out.append(row)
+        return out
+
+    def read_html(self, ids: Sequence[str], jobs: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        t = self.read_table("html", ["id", "html"], jobs=jobs, ids=ids)
+        return dict(zip(t.column("id").to_pylist(), t.column("html").to_pylist()))
+
+
+def main():
+    import argparse
+    from config import COLUMNAR_ROOT, STORAGE_ROOT
+
+    ap = argparse.ArgumentParser(description="Export job folders to partitioned Parquet")
+    ap.add_argument("jobs", nargs="*", help="job names under storage/ (default: all)")
+    ap.add_argument("--root", type=Path, default=COLUMNAR_ROOT)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    export = ColumnarExport(args.root)
+    names = args.jobs or sorted(p.name for p in STORAGE_ROOT.iterdir() if p.is_dir() and not p.name.startswith("_"))
+    for name in names:
+        export.export_job(STORAGE_ROOT / name)
+
+
+if __name__ == "__main__":
+    main()
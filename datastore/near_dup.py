@@ -0,0 +1,155 @@
+# datastore/near_dup.py
+
+import hashlib
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+from config import NEAR_DUP, ts
+from utils import ensure_dir
+
+logger = logging.getLogger("datastore.neardup")
+
+_BITS = 64
+_STRIP = re.compile(r"[\s\W_]+", re.UNICODE)   # whitespace + punctuation (CJK and ASCII)
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*%?")
+# direction / negation words: near-identical texts that differ in one of these
+# (增长12.3% vs 下降12.3%) can carry opposite sentiment and are never merged
+_POLARITY = re.compile(
+    r"涨|跌|增|减|升|降|盈|亏|赚|赔|利好|利空|看多|看空|做多|做空|买入|卖出|增持|减持|上调|下调|"
+    r"走强|走弱|反弹|回落|新高|新低|超预期|不及|扭亏|转正|转负|不|未|没|无|非|"
+    r"\b(?:up|down|rise|rises|rose|fall|falls|fell|gain|gains|loss|losses|beat|miss|misses|"
+    r"higher|lower|bullish|bearish|buy|sell|upgrade|downgrade|not|no)\b", re.IGNORECASE)
+
+
+def _normalize(text: str) -> str:
+    return _STRIP.sub("", (text or "").lower())
+
+
+def simhash(text: str, shingle: int = 3) -> Optional[int]:
+    """64-bit SimHash over character n-grams of the normalized text (None if too short)."""
+    t = _normalize(text)
+    if len(t) < NEAR_DUP["min_chars"]:
+        return None
+    grams = {t[i:i + shingle] for i in range(max(1, len(t) - shingle + 1))}
+    # bit columns of all gram hashes, counted in C via zip/str.count
+    rows = [format(int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+            for g in grams]
+    half = len(rows) / 2
+    fp = 0
+    for col in zip(*rows):
+        fp = (fp << 1) | (col.count("1") > half)
+    return fp
+
+
+def signature(text: str) -> str:
+    """Numbers and polarity words of a text; posts only cluster when these are identical."""
+    t = (text or "").lower()
+    nums = sorted(set(_NUMBER.findall(t)))
+    words = sorted(set(_POLARITY.findall(t)))
+    return " ".join(nums) + "|" + " ".join(words)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _signed(v: int) -> int:
+    # SQLite INTEGER is signed 64-bit
+    return v - (1 << 64) if v >= 1 << 63 else v
+
+
+class NearDupIndex:
+    """Cross-job near-duplicate clusters of post text (SimHash + LSH banding).
+
+    Each fingerprint is split into `bands` bands; candidates are posts sharing
+    at least one band value, confirmed by Hamming distance <= `max_distance`
+    (bands > max_distance guarantees no true match is missed) and by an
+    identical signature() - the same numbers and direction / negation words -
+    since a summary (and its sentiment) is copied across the cluster. A post
+    joins the cluster of its closest match, or starts a new one; the first post of a
+    cluster is its representative. Once summarized, the cluster keeps a
+    reference to the representative (its content hash and id); the summary
+    itself lives in the LLM result cache (llm/cache.py), so a repost in a later
+    job or another tab reuses it only while it is valid for the current model,
+    prompt version and sampling params.
+    """
+
+    def __init__(self, root: Path, max_distance: Optional[int] = None, bands: Optional[int] = None):
+        ensure_dir(root)
+        self.max_distance = NEAR_DUP["max_distance"] if max_distance is None else max_distance
+        self.bands = bands or NEAR_DUP["bands"]
+        if self.bands <= self.max_distance:
+            raise ValueError("bands must exceed max_distance for LSH banding to find every match")
+        self.width = _BITS // self.bands
+        # opened by main.py, used from the event loop; calls are never concurrent
+        self.db = sqlite3.connect(root / "near_dup.sqlite3", timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS posts ("
+            " key TEXT PRIMARY KEY, job TEXT, tab TEXT, id TEXT, simhash INTEGER, sig TEXT, cluster TEXT,"
+            " added_at TEXT);"
+            "CREATE TABLE IF NOT EXISTS bands (band INTEGER, value INTEGER, key TEXT);"
+            "CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, value);"
+            "CREATE TABLE IF NOT EXISTS clusters (cluster TEXT PRIMARY KEY, size INTEGER, result_ref TEXT, rep_id TEXT);"
+        )
+
+    def _bands(self, fp: int) -> List[Tuple[int, int]]:
+        mask = (1 << self.width) - 1
+        return [(b, (fp >> (b * self.width)) & mask) for b in range(self.bands)]
+
+    @staticmethod
+    def key(job: str, post: Dict[str, Any]) -> str:
+        return f"{job}|{post.get('tab')}|{post.get('id')}"
+
+    def assign(self, job: str, post: Dict[str, Any]) -> str:
+        """Cluster id of `post` (indexing it on first sight)."""
+        key = self.key(job, post)
+        row = self.db.execute("SELECT cluster FROM posts WHERE key = ?", (key,)).fetchone()
+        if row:
+            return row[0]
+        fp = simhash(post.get("text") or "")
+        sig = signature(post.get("text") or "")
+        cluster = key
+        if fp is not None:
+            best = None
+            for band, value in self._bands(fp):
+                for other_fp, other_cluster in self.db.execute(
+                        "SELECT p.simhash, p.cluster FROM bands b JOIN posts p ON p.key = b.key"
+                        " WHERE b.band = ? AND b.value = ? AND p.sig = ?", (band, value, sig)):
+                    d = hamming(fp, other_fp & ((1 << 64) - 1))
+                    if d <= self.max_distance and (best is None or d < best[0]):
+                        best = (d, other_cluster)
+            if best:
+                cluster = best[1]
+        with self.db:
+            self.db.execute("INSERT INTO posts (key, job, tab, id, simhash, sig, cluster, added_at)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (key, job, post.get("tab"), str(post.get("id")),
+                             None if fp is None else _signed(fp), sig, cluster, ts()))
+            if fp is not None:
+                self.db.executemany("INSERT INTO bands (band, value, key) VALUES (?, ?, ?)",
+                                    [(b, v, key) for b, v in self._bands(fp)])
+            self.db.execute("INSERT INTO clusters (cluster, size) VALUES (?, 1)"
+                            " ON CONFLICT(cluster) DO UPDATE SET size = size + 1", (cluster,))
+        return cluster
+
+    def result_ref(self, cluster: str) -> Optional[Tuple[str, str]]:
+        """(content hash, post id) of the summarized representative, if any."""
+        row = self.db.execute("SELECT result_ref, rep_id FROM clusters WHERE cluster = ?", (cluster,)).fetchone()
+        return (row[0], row[1]) if row and row[0] else None
+
+    def set_result_ref(self, cluster: str, content: str, post_id: Any):
+        with self.db:
+            self.db.execute("UPDATE clusters SET result_ref = ?, rep_id = ? WHERE cluster = ?",
+                            (content, str(post_id), cluster))
+
+    def stats(self) -> Dict[str, int]:
+        posts, clusters = self.db.execute("SELECT COUNT(*), COUNT(DISTINCT cluster) FROM posts").fetchone()
+        return {"posts": posts, "clusters": clusters}
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,252 @@
+# datastore/post_store.py
+
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import orjson
+
+from datastore.blobs import record_html
+from utils import ensure_dir, list_record_files, read_json_list, save_json_list
+
+logger = logging.getLogger("datastore.posts")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    job TEXT NOT NULL, tab TEXT NOT NULL, id TEXT NOT NULL,
+    url TEXT, author TEXT, title TEXT, text TEXT, text_hash TEXT,
+    post_time TEXT, timestamp TEXT,
+    record BLOB,            -- full record without html
+    html TEXT,              -- kept out of `record` so most queries never read it
+    PRIMARY KEY (job, tab, id)
+);
+CREATE INDEX IF NOT EXISTS posts_id ON posts (id);
+CREATE INDEX IF NOT EXISTS posts_tab_time ON posts (tab, post_time);
+CREATE INDEX IF NOT EXISTS posts_time ON posts (post_time);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    job TEXT NOT NULL, tab TEXT NOT NULL, id TEXT NOT NULL,
+    summary TEXT, sentiment TEXT, record BLOB,
+    PRIMARY KEY (job, tab, id)
+);
+CREATE INDEX IF NOT EXISTS summaries_id ON summaries (id);
+CREATE INDEX IF NOT EXISTS summaries_sentiment ON summaries (sentiment);
+
+CREATE TABLE IF NOT EXISTS post_symbols (
+    job TEXT NOT NULL, tab TEXT NOT NULL, id TEXT NOT NULL, symbol TEXT NOT NULL,
+    PRIMARY KEY (job, tab, id, symbol)
+);
+CREATE INDEX IF NOT EXISTS post_symbols_symbol ON post_symbols (symbol, job);
+
+CREATE TABLE IF NOT EXISTS post_themes (
+    job TEXT NOT NULL, tab TEXT NOT NULL, id TEXT NOT NULL, theme TEXT NOT NULL,
+    PRIMARY KEY (job, tab, id, theme)
+);
+CREATE INDEX IF NOT EXISTS post_themes_theme ON post_themes (theme, job);
+"""
+
+
+def _post_id(rec: Dict[str, Any]) -> Optional[str]:
+    pid = rec.get("id") if rec.get("id") is not None else rec.get("post_id")
+    return str(pid) if pid is not None else None
+
+
+class PostStore:
+    """Indexed SQLite store for posts, summaries and post -> symbol/theme links.
+
+    Rows are keyed by (job, tab, id), so the same post crawled by several jobs
+    is kept once per job. WAL mode lets a crawler or live tail write while the
+    summarizer / report read. `import_job` / `export_job` convert to and from
+    the per-job raw/*.json and summary/*.json files.
+    """
+
+    def __init__(self, path: Path):
+        ensure_dir(path.parent)
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+    # ---- write ----
+    def add_posts(self, job: str, records: Iterable[Dict[str, Any]]) -> int:
+        n = 0
+        with self.db:
+            for rec in records:
+                pid = _post_id(rec)
+                if pid is None:
+                    continue
+                tab = rec.get("tab") or ""
+                body = {k: v for k, v in rec.items() if k != "html"}
+                self.db.execute(
+                    "INSERT OR REPLACE INTO posts (job, tab, id, url, author, title, text, text_hash,"
+                    " post_time, timestamp, record, html) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job, tab, pid, rec.get("url"), rec.get("author"), rec.get("title"), rec.get("text"),
+                     rec.get("text_hash"), rec.get("post_time"), rec.get("timestamp"),
+                     orjson.dumps(body, option=orjson.OPT_NON_STR_KEYS), rec.get("html")),
+                )
+                self.db.execute("DELETE FROM post_symbols WHERE job = ? AND tab = ? AND id = ?", (job, tab, pid))
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO post_symbols (job, tab, id, symbol) VALUES (?, ?, ?, ?)",
+                    [(job, tab, pid, s) for s in rec.get("symbols") or []],
+                )
+                n += 1
+        return n
+
+    def add_summaries(self, job: str, records: Iterable[Dict[str, Any]]) -> int:
+        n = 0
+        with self.db:
+            for rec in records:
+                pid = _post_id(rec)
+                if pid is None:
+                    continue
+                tab = rec.get("tab") or ""
+                self.db.execute(
+                    "INSERT OR REPLACE INTO summaries (job, tab, id, summary, sentiment, record)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (job, tab, pid, rec.get("summary"), rec.get("sentiment"),
+                     orjson.dumps(rec, option=orjson.OPT_NON_STR_KEYS)),
+                )
+                self.db.execute("DELETE FROM post_themes WHERE job = ? AND tab = ? AND id = ?", (job, tab, pid))
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO post_themes (job, tab, id, theme) VALUES (?, ?, ?, ?)",
+                    [(job, tab, pid, t) for t in rec.get("themes") or [] if t],
+                )
+                n += 1
+        return n
+
+    # ---- read ----
+    def posts(self, job: Optional[str] = None, tab: Optional[str] = None,
+              symbol: Optional[str] = None, ids: Optional[Sequence[str]] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              with_html: bool = False) -> Iterator[Dict[str, Any]]:
+        """Posts matching every given filter (post_time range is ISO strings, inclusive)."""
+        where, params = [], []
+        if symbol is not None:
+            where.append("EXISTS (SELECT 1 FROM post_symbols s WHERE s.job = p.job AND s.tab = p.tab"
+                         " AND s.id = p.id AND s.symbol = ?)")
+            params.append(symbol)
+        for col, val in (("job", job), ("tab", tab)):
+            if val is not None:
+                where.append(f"p.{col} = ?")
+                params.append(val)
+        if since is not None:
+            where.append("p.post_time >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("p.post_time <= ?")
+            params.append(until)
+        if ids is not None:
+            ids = [str(i) for i in ids]
+            where.append(f"p.id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        sql = "SELECT p.record, p.html FROM posts p"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        for row in self.db.execute(sql + " ORDER BY p.post_time", params):
+            rec = orjson.loads(row["record"])
+            if with_html:
+                rec["html"] = row["html"] or record_html(rec)
+            yield rec
+
+    def summaries(self, job: Optional[str] = None, tab: Optional[str] = None,
+                  theme: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        where, params = [], []
+        if theme is not None:
+            where.append("EXISTS (SELECT 1 FROM post_themes t WHERE t.job = s.job AND t.tab = s.tab"
+                         " AND t.id = s.id AND t.theme = ?)")
+            params.append(theme)
+        for col, val in (("job", job), ("tab", tab)):
+            if val is not None:
+                where.append(f"s.{col} = ?")
+                params.append(val)
+        sql = "SELECT s.record FROM summaries s"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        # insertion order, i.e. the order of the summary files
+        for row in self.db.execute(sql + " ORDER BY s.rowid", params):
+            yield orjson.loads(row["record"])
+
+    def summarized_posts(self, job: str) -> Iterator[Dict[str, Any]]:
+        """Posts of `job` that have a summary (the join generate_report needs)."""
+        sql = ("SELECT p.record FROM posts p JOIN summaries s"
+               " ON s.job = p.job AND s.tab = p.tab AND s.id = p.id WHERE p.job = ?")
+        for row in self.db.execute(sql, (job,)):
+            yield orjson.loads(row["record"])
+
+    def symbol_counts(self, job: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        sql = "SELECT symbol, COUNT(*) AS n FROM post_symbols"
+        params: List[Any] = []
+        if job is not None:
+            sql += " WHERE job = ?"
+            params.append(job)
+        sql += " GROUP BY symbol ORDER BY n DESC LIMIT ?"
+        return [dict(r) for r in self.db.execute(sql, params + [limit])]
+
+    def jobs(self) -> List[str]:
+        return [r[0] for r in self.db.execute("SELECT DISTINCT job FROM posts ORDER BY job")]
+
+    # ---- JSON import / export ----
+    def import_job(self, job_dir: Path, job: Optional[str] = None) -> Dict[str, int]:
+        """Load a job's raw/ and summary/ record files (JSON or segmented)."""
+        job = job or job_dir.name
+        n_posts = sum(self.add_posts(job, read_json_list(f)) for f in list_record_files(job_dir / "raw"))
+        n_sum = 0
+        if (job_dir / "summary").is_dir():
+            n_sum = sum(self.add_summaries(job, read_json_list(f)) for f in list_record_files(job_dir / "summary"))
+        logger.info(f"Imported {job}: {n_posts} posts, {n_sum} summaries -> {self.path}")
+        return {"posts": n_posts, "summaries": n_sum}
+
+    def export_job(self, job: str, out_dir: Path) -> Dict[str, int]:
+        """Write raw/posts_<tab>.json and summary/summary_<tab>.json for one job."""
+        counts = {"posts": 0, "summaries": 0}
+        tabs = [r[0] for r in self.db.execute("SELECT DISTINCT tab FROM posts WHERE job = ?", (job,))]
+        for tab in tabs:
+            recs = list(self.posts(job=job, tab=tab, with_html=True))
+            ensure_dir(out_dir / "raw")
+            save_json_list(out_dir / "raw" / f"posts_{tab}.json", recs)
+            counts["posts"] += len(recs)
+        tabs = [r[0] for r in self.db.execute("SELECT DISTINCT tab FROM summaries WHERE job = ?", (job,))]
+        for tab in tabs:
+            recs = list(self.summaries(job=job, tab=tab))
+            ensure_dir(out_dir / "summary")
+            save_json_list(out_dir / "summary" / f"summary_{tab}.json", recs)
+            counts["summaries"] += len(recs)
+        return counts
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    import argparse
+    from config import POST_STORE_PATH, STORAGE_ROOT
+
+    ap = argparse.ArgumentParser(description="Import/export jobs to the SQLite post store")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import")
+    imp.add_argument("jobs", nargs="*", help="job names under storage/ (default: all)")
+    exp = sub.add_parser("export")
+    exp.add_argument("job")
+    exp.add_argument("out_dir", type=Path)
+    ap.add_argument("--db", type=Path, default=POST_STORE_PATH)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = PostStore(args.db)
+    try:
+        if args.cmd == "import":
+            names = args.jobs or sorted(p.name for p in STORAGE_ROOT.iterdir()
+                                        if p.is_dir() and not p.name.startswith("_"))
+            for name in names:
+                store.import_job(STORAGE_ROOT / name)
+        else:
+            print(store.export_job(args.job, args.out_dir))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# datastore/segments.py
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import orjson
+
+logger = logging.getLogger("datastore.segments")
+
+SEGMENT_BYTES = 64 * 1024 * 1024   # rotate to a new segment past this size
+MAX_SEGMENTS = 16                  # compact when more live segments than this
+
+
+def record_time(r: Dict[str, Any]) -> Optional[str]:
+    """ISO-like post_time of a record, else its crawl timestamp (None if neither)."""
+    for v in (r.get("post_time"), r.get("timestamp")):
+        if isinstance(v, str) and len(v) >= 10 and v[4] == "-" and v[7] == "-":
+            return v
+    return None
+
+
+def _widen(rng: Optional[List[str]], t: Optional[str]) -> Optional[List[str]]:
+    if t is None:
+        return rng
+    if rng is None:
+        return [t, t]
+    return [min(rng[0], t), max(rng[1], t)]
+
+
+def segment_dir(path: Path) -> Path:
+    """raw/posts_hot.json -> raw/posts_hot.seg (same logical file, segmented form)."""
+    return path.with_suffix(".seg")
+
+
+class SegmentStore:
+    """Append-only record store: JSONL segments + an append-only key index.
+
+        posts_hot.seg/
+            manifest.json        {"segments": [...], "unique_keys": [...],
+                                  "time_range": [first, last] record_time}  (atomic rewrite)
+            seg_00000.jsonl      one record per line
+            keys.jsonl           one dedupe key per line, same order as records
+
+    append() costs O(batch) instead of O(total): the key set is loaded once per
+    store object and only new lines are written. compact() rewrites the live
+    segments into one, dropping duplicates that slipped in after a crash.
+    """
+
+    def __init__(self, root: Path, unique_keys: Sequence[str] = ("id", "tab", "text_hash"),
+                 segment_bytes: int = SEGMENT_BYTES, max_segments: int = MAX_SEGMENTS):
+        self.root = root
+        self.unique_keys = tuple(unique_keys)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.manifest_path = root / "manifest.json"
+        self.keys_path = root / "keys.jsonl"
+        self.manifest: Dict[str, Any] = self._load_manifest()
+        self._keys: Optional[Set[Tuple]] = None
+
+    # ---- manifest ----
+    def _load_manifest(self) -> Dict[str, Any]:
+        if self.manifest_path.exists():
+            return orjson.loads(self.manifest_path.read_bytes())
+        return {"segments": [], "unique_keys": list(self.unique_keys), "next": 0, "time_range": None}
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_bytes(orjson.dumps(self.manifest))
+        os.replace(tmp, self.manifest_path)
+
+    def _new_segment(self) -> str:
+        name = f"seg_{self.manifest['next']:05d}.jsonl"
+        self.manifest["next"] += 1
+        self.manifest["segments"].append(name)
+        self._save_manifest()
+        return name
+
+    # ---- keys ----
+    def key(self, d: Dict[str, Any]) -> Tuple:
+        return tuple(d.get(k) for k in self.unique_keys)
+
+    def keys(self) -> Set[Tuple]:
+        if self._keys is None:
+            if self.keys_path.exists():
+                self._keys = set()
+                for k in _read_lines(self.keys_path):
+                    self._keys.add(tuple(k))
+            else:
+                # no key index (older store / deleted): rebuild from records
+                self._keys = {self.key(r) for r in self}
+        return self._keys
+
+    # ---- write ----
+    def append(self, items: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """Append records whose key is new. Returns (added, total)."""
+        seen = self.keys()
+        rec_lines, key_lines = [], []
+        rng = self.manifest.get("time_range")
+        for it in items:
+            k = self.key(it)
+            if k in seen:
+                continue
+            seen.add(k)
+            rng = _widen(rng, record_time(it))
+            rec_lines.append(orjson.dumps(it, option=orjson.OPT_NON_STR_KEYS))
+            key_lines.append(orjson.dumps(list(k)))
+        if rec_lines:
+            self.root.mkdir(parents=True, exist_ok=True)
+            seg = self.manifest["segments"][-1] if self.manifest["segments"] else self._new_segment()
+            seg_path = self.root / seg
+            if seg_path.exists() and seg_path.stat().st_size >= self.segment_bytes:
+                seg_path = self.root / self._new_segment()
+            if "time_range" in self.manifest and rng != self.manifest["time_range"]:
+                # widened before the records land: a crash can only leave it too wide
+                self.manifest["time_range"] = rng
+                self._save_manifest()
+            # records first, then keys: a crash in between can only cause a
+            # duplicate later (removed by compact), never a lost record
+            _append_lines(seg_path, rec_lines)
+            _append_lines(self.keys_path, key_lines)
+            if len(self.manifest["segments"]) > self.max_segments:
+                self.compact()
+        return len(rec_lines), len(seen)
+
+    def compact(self):
+        """Merge all live segments into one deduplicated segment."""
+        old = list(self.manifest["segments"])
+        if not old:
+            return
+        seen: Set[Tuple] = set()
+        rng = None
+        name = f"seg_{self.manifest['next']:05d}.jsonl"
+        self.manifest["next"] += 1
+        tmp = self.root / (name + ".tmp")
+        with open(tmp, "wb") as out, open(self.keys_path.with_suffix(".tmp"), "wb") as kout:
+            for rec in self:
+                k = self.key(rec)
+                if k in seen:
+                    continue
+                seen.add(k)
+                rng = _widen(rng, record_time(rec))
+                out.write(orjson.dumps(rec, option=orjson.OPT_NON_STR_KEYS) + b"\n")
+                kout.write(orjson.dumps(list(k)) + b"\n")
+        os.replace(tmp, self.root / name)
+        os.replace(self.keys_path.with_suffix(".tmp"), self.keys_path)
+        self.manifest["segments"] = [name]
+        self.manifest["time_range"] = rng
+        self._save_manifest()
+        for seg in old:
+            (self.root / seg).unlink(missing_ok=True)
+        self._keys = seen
+        logger.info(f"Compacted {len(old)} segments -> {name} ({len(seen)} records) in {self.root}")
+
+    # ---- read ----
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for seg in self.manifest["segments"]:
+            p = self.root / seg
+            if p.exists():
+                yield from _read_lines(p)
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def count(self) -> int:
+        """Number of records, counted from the key index without decoding any."""
+        if not self.keys_path.exists():
+            return len(self.keys())
+        n = 0
+        with open(self.keys_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                n += chunk.count(b"\n")
+        return n
+
+    def time_range(self) -> Optional[List[str]]:
+        """[first, last] record_time over all records, kept in the manifest by
+        append() / compact(); stores written before it was tracked are scanned once."""
+        if "time_range" not in self.manifest:
+            rng = None
+            for rec in self:
+                rng = _widen(rng, record_time(rec))
+            self.manifest["time_range"] = rng
+            self._save_manifest()
+        return self.manifest["time_range"]
+
+
+def _append_lines(path: Path, lines: List[bytes]):
+    with open(path, "ab+") as f:
+        # a crash mid-line leaves no trailing newline; start on a fresh line
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        f.write(b"\n".join(lines) + b"\n")
+
+
+def _read_lines(path: Path) -> Iterator[Any]:
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError:
+                logger.warning(f"Skipping torn line in {path}")
@@ -0,0 +1,169 @@
+# llm/cache.py
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import orjson
+
+from config import LLM_CACHE, LLM_CACHE_PATH
+from utils import ensure_dir
+
+logger = logging.getLogger("llm.cache")
+
+
+def normalize(text: str) -> str:
+    """NFKC + collapsed whitespace, so re-crawled copies of a post hash alike."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def content_hash(text: str, html: str = "") -> str:
+    return hashlib.sha256(f"{normalize(text)}\x00{normalize(html)}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Disk cache of parsed LLM results (SQLite, storage/_index/llm_cache.sqlite3).
+
+    The key hashes (content hash, model, prompt version, sampling params), so a
+    changed template, model or temperature never returns an old answer; entries
+    of other versions just stop being hit until they age out or `invalidate()`
+    drops them. Entries older than `max_age_days` and, least recently used
+    first, anything over `max_mb` are evicted on open and every `evict_every`
+    stores. Pinned entries (near-dup cluster representatives, see `pin()`) are
+    exempt from the size limit, so only age and `invalidate()` drop them.
+    Safe to share between the event loop and worker threads.
+    """
+
+    def __init__(self, path: Path = LLM_CACHE_PATH, max_mb: Optional[float] = None,
+                 max_age_days: Optional[float] = None, evict_every: int = 256):
+        ensure_dir(path.parent)
+        self.max_bytes = int((LLM_CACHE["max_mb"] if max_mb is None else max_mb) * 1024 * 1024)
+        self.max_age = (LLM_CACHE["max_age_days"] if max_age_days is None else max_age_days) * 86400
+        self.evict_every = evict_every
+        self.hits = self.misses = self.stored = self.evicted = 0
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, model TEXT, prompt_version TEXT, result BLOB, bytes INTEGER,"
+            " created_at REAL, last_hit REAL, hits INTEGER DEFAULT 0, pinned INTEGER DEFAULT 0);"
+            "CREATE INDEX IF NOT EXISTS results_last_hit ON results (last_hit);"
+            "CREATE INDEX IF NOT EXISTS results_created ON results (created_at);"
+        )
+        self.evict()
+
+    @staticmethod
+    def key(content: str, model: str, prompt_version: str, params: Dict[str, Any]) -> str:
+        return hashlib.sha256(orjson.dumps([content, model, prompt_version, params],
+                                           option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self.db.execute("SELECT result, created_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            with self.db:
+                self.db.execute("UPDATE results SET last_hit = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+        return orjson.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any], model: str, prompt_version: str):
+        blob = orjson.dumps(result)
+        now = time.time()
+        with self._lock:
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO results (key, model, prompt_version, result, bytes, created_at, last_hit)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)", (key, model, prompt_version, blob, len(blob), now, now))
+            self.stored += 1
+        if self.stored % self.evict_every == 0:
+            self.evict()
+
+    def pin(self, keys: Sequence[str]):
+        """Exempt these entries from size eviction (age and invalidate still apply)."""
+        marks = ", ".join("?" * len(keys))
+        with self._lock, self.db:
+            self.db.execute(f"UPDATE results SET pinned = 1 WHERE key IN ({marks})", tuple(keys))
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used unpinned ones until under max_bytes."""
+        with self._lock, self.db:
+            n = self.db.execute("DELETE FROM results WHERE created_at < ?",
+                                (time.time() - self.max_age,)).rowcount
+            total = self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                drop, cutoff = 0, None
+                for last_hit, size in self.db.execute(
+                        "SELECT last_hit, bytes FROM results WHERE pinned = 0 ORDER BY last_hit"):
+                    drop += size
+                    cutoff = last_hit
+                    if total - drop <= self.max_bytes:
+                        break
+                if cutoff is not None:
+                    n += self.db.execute("DELETE FROM results WHERE pinned = 0 AND last_hit <= ?",
+                                         (cutoff,)).rowcount
+        self.evicted += n
+        return n
+
+    def invalidate(self, keep_versions: Optional[Sequence[str]] = None) -> int:
+        """Delete every entry, or only those not made with one of `keep_versions`."""
+        with self._lock, self.db:
+            if keep_versions is None:
+                n = self.db.execute("DELETE FROM results").rowcount
+            else:
+                marks = ", ".join("?" * len(keep_versions))
+                n = self.db.execute(f"DELETE FROM results WHERE prompt_version NOT IN ({marks})",
+                                    tuple(keep_versions)).rowcount
+        self.evicted += n
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM results").fetchone()
+            versions = dict(self.db.execute("SELECT prompt_version, COUNT(*) FROM results GROUP BY prompt_version"))
+        return {"hits": self.hits, "misses": self.misses, "stored": self.stored, "evicted": self.evicted,
+                "entries": entries, "mb": round(size / 1024 / 1024, 2), "versions": versions}
+
+    def log_stats(self, prefix: str = "LLM cache"):
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "-"
+        logger.info(f"{prefix}: {self.hits} hits / {self.misses} misses ({rate} hit rate), "
+                    f"{self.stored} stored, {self.evicted} evicted")
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    import argparse
+
+    from llm.summarizer import prompt_version
+
+    ap = argparse.ArgumentParser(description="Inspect / trim the LLM result cache")
+    ap.add_argument("cmd", choices=["stats", "evict", "invalidate"])
+    ap.add_argument("--all", action="store_true", help="invalidate: also drop entries of the current prompt versions")
+    args = ap.parse_args()
+
+    cache = ResultCache()
+    if args.cmd == "evict":
+        print(f"evicted {cache.evict()} entries")
+    elif args.cmd == "invalidate":
+        # current single-post and batch prompts both stay
+        n = cache.invalidate(None if args.all else [prompt_version(), prompt_version(batch=True)])
+        print(f"invalidated {n} entries")
+    stats = cache.stats()
+    stats["current_versions"] = [prompt_version(), prompt_version(batch=True)]
+    print(stats)
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,32 @@
+import asyncio
+import hashlib
+import re
 import time
 import json
 import logging
-from typing import Dict, Any, List
+from collections import defaultdict
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
 from tqdm import tqdm
+import httpx
 import requests
 import os
 from dotenv import load_dotenv
 
+from config import DEFAULT_SUMMARIZE_CONCURRENCY, LLM_CACHE, SUMMARY_BATCH
+from datastore.blobs import record_html
+from llm.cache import ResultCache, content_hash
+from utils import read_json_list, records_exist, replace_json_list
+
 logger = logging.getLogger("summarizer")
+logging.getLogger("httpx").setLevel(logging.WARNING)   # one INFO line per request otherwise
 
 FIREWORKS_URL = "https://api.fireworks.ai/inference/v1/chat/completions"
 MODEL = "accounts/fireworks/models/gpt-oss-20b"
+SAMPLING = {"max_tokens": 1024, "temperature": 0.3, "top_p": 1}
+# Bump when results must be recomputed although the prompt text is unchanged
+# (edits to build_prompt's template are picked up by prompt_version() itself)
+PROMPT_VERSION = 1
 
 
 # -------------------------------------------------------
@@ -19,7 +34,7 @@ MODEL = "accounts/fireworks/models/gpt-oss-20b"
 # -------------------------------------------------------
 def build_prompt(post: Dict[str, Any]) -> str:
     text = post.get("text", "").strip()
-    html = post.get("html", "").strip()
+    html = record_html(post).strip()  # inline or from the blob store
 
     return f"""
             Please analyze the following Xueqiu investor post and produce a STRICT JSON output (UTF-8, no extra text):
@@ -43,16 +58,93 @@ def build_prompt(post: Dict[str, Any]) -> str:
             """
 
 
+def build_batch_prompt(posts: List[Dict[str, Any]]) -> str:
+    """Several posts in one request; the answer is a JSON array keyed by post id."""
+    blocks = []
+    for post in posts:
+        block = f"[id={post.get('id')}]\n{(post.get('text') or '').strip()}"
+        html = record_html(post).strip()
+        if html:
+            block += f"\nHTML (optional):\n{html}"
+        blocks.append(block)
+    joined = "\n\n".join(blocks)
+
+    return f"""
+            Please analyze each of the following Xueqiu investor posts and produce a STRICT JSON output (UTF-8, no extra text):
+            a JSON array with exactly one object per post.
+
+            Required fields of each object:
+            - "id": the post id exactly as given in its [id=...] line.
+            - "summary": 1–2 sentence English summary, factual only.
+            - "sentiment": one of ["positive", "neutral", "negative"].
+            - "themes": 2–5 short English topic labels.
+            - "entities": 0–5 companies/people explicitly mentioned.
+
+            Rules:
+            - No fabrication.
+            - Only use details from each post's own text.
+            - Output pure JSON only.
+
+            Posts:
+            {joined}
+            """
+
+
+def prompt_version(batch: bool = False) -> str:
+    """PROMPT_VERSION plus a fingerprint of the template, part of every cache key."""
+    if batch:
+        template = "batch:" + build_batch_prompt([{"id": "{id}", "text": "{text}"}])
+    else:
+        template = build_prompt({"text": "{text}"})
+    return f"v{PROMPT_VERSION}-{hashlib.sha256(template.encode('utf-8')).hexdigest()[:12]}"
+
+
+# -------------------------------------------------------
+# Result cache (llm/cache.py)
+# -------------------------------------------------------
+_cache: ResultCache | None = None
+
+
+def result_cache() -> ResultCache | None:
+    """Process-wide LLM result cache, or None when LLM_CACHE["enabled"] is off."""
+    global _cache
+    if _cache is None and LLM_CACHE["enabled"]:
+        _cache = ResultCache()
+    return _cache
+
+
+def _cache_lookup(post: Dict[str, Any], batch: bool = False) -> Tuple[str | None, Dict[str, Any] | None]:
+    cache = result_cache()
+    if cache is None:
+        return None, None
+    key = ResultCache.key(content_hash(post.get("text") or "", record_html(post)),
+                          MODEL, prompt_version(batch), SAMPLING)
+    hit = cache.get(key)
+    if hit is not None:
+        hit = {**hit, "id": post.get("id"), "tab": post.get("tab")}
+    return key, hit
+
+
+def _cache_store(key: str | None, parsed: Dict[str, Any] | None, batch: bool = False):
+    if key and parsed:
+        result_cache().put(key, {k: v for k, v in parsed.items() if k not in ("id", "tab")},
+                           MODEL, prompt_version(batch))
+
+
+def log_cache_stats():
+    if _cache is not None:
+        _cache.log_stats()
+
+
 # -------------------------------------------------------
 # HTTP POST request to Fireworks
 # -------------------------------------------------------
 
-def fireworks_chat(prompt: str, api_key: str) -> str:
+def _chat_request(prompt: str, api_key: str, **sampling) -> Tuple[Dict[str, Any], Dict[str, str]]:
     payload = {
         "model": MODEL,
-        "max_tokens": 1024,
-        "temperature": 0.3,
-        "top_p": 1,
+        **SAMPLING,
+        **sampling,
         "messages": [
             {"role": "user", "content": prompt}
         ]
@@ -63,6 +155,11 @@ def fireworks_chat(prompt: str, api_key: str) -> str:
         "Content-Type": "application/json",
         "Authorization": f"Bearer {api_key}"
     }
+    return payload, headers
+
+
+def fireworks_chat(prompt: str, api_key: str) -> str:
+    payload, headers = _chat_request(prompt, api_key)
 
     response = requests.post(FIREWORKS_URL, headers=headers, data=json.dumps(payload))
 
@@ -86,42 +183,159 @@ def summarize_one(post: Dict[str, Any],
         logger.error(f"Post is string, not JSON: {post[:20]}")
         return None
 
+    key, hit = _cache_lookup(post)
+    if hit is not None:
+        return hit
+
     prompt = build_prompt(post)
 
     for attempt in range(1, retries + 1):
         try:
             raw_output = fireworks_chat(prompt, api_key)
-
-            try:
-                parsed = json.loads(raw_output)
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON for post {post.get('id')}:\n{raw_output}")
-                return None
-
-            parsed["id"] = post.get("id")
-            parsed["tab"] = post.get("tab")
+            parsed = _parse_result(post, raw_output)
+            _cache_store(key, parsed)
             return parsed
 
         except Exception as e:
-            logger.warning(f"Attempt {attempt} failed for post {post.get('id')}: {e}")
+            time.sleep(_retry_delay(post, attempt, e))
 
-            # rate limit
-            if "rate limit" in str(e).lower() or "429" in str(e):
-                sleep_time = attempt * 1.2
-            else:
-                sleep_time = 1.0
+    logger.error(f"FAILED after {retries} retries → post {post.get('id')}")
+    return None
 
-            time.sleep(sleep_time)
 
-    logger.error(f"FAILED after {retries} retries → post {post.get('id')}")
+def _parse_result(post: Dict[str, Any], raw_output: str) -> Dict[str, Any] | None:
+    try:
+        parsed = json.loads(raw_output)
+    except json.JSONDecodeError:
+        logger.error(f"Invalid JSON for post {post.get('id')}:\n{raw_output}")
+        return None
+
+    parsed["id"] = post.get("id")
+    parsed["tab"] = post.get("tab")
+    return parsed
+
+
+def _retry_delay(post: Dict[str, Any], attempt: int, e: Exception) -> float:
+    logger.warning(f"Attempt {attempt} failed for post {post.get('id')}: {e}")
+
+    # rate limit
+    if "rate limit" in str(e).lower() or "429" in str(e):
+        return attempt * 1.2
+    return 1.0
+
+
+# -------------------------------------------------------
+# Summarize one post, once per near-duplicate cluster
+# -------------------------------------------------------
+def summarize_clustered(post: Dict[str, Any], api_key: str, dedup=None,
+                        job: str | None = None) -> Tuple[Dict[str, Any] | None, bool]:
+    """summarize_one unless a near-duplicate (datastore/near_dup.py) was already
+    summarized; then that result is copied onto this post. Returns (result, reused)."""
+    if dedup is None:
+        return summarize_one(post, api_key), False
+    cluster = dedup.assign(job, post)
+    known = _cluster_result(dedup, cluster, post)
+    if known:
+        return known, True
+    res = summarize_one(post, api_key)
+    _set_cluster_result(dedup, cluster, post, res)
+    return res, False
+
+
+def _cluster_result(dedup, cluster: str, post: Dict[str, Any]) -> Dict[str, Any] | None:
+    """The cluster representative's summary, resolved through the result cache, so
+    it is only reused under the current MODEL / prompt version / sampling params
+    and while the cache entry is live (age eviction, `python -m llm.cache invalidate`;
+    the entry is pinned against size eviction)."""
+    cache = result_cache()
+    ref = dedup.result_ref(cluster) if cache is not None else None
+    if ref is None:
+        return None
+    content, rep_id = ref
+    for batch in (False, True):
+        hit = cache.get(ResultCache.key(content, MODEL, prompt_version(batch), SAMPLING))
+        if hit is not None:
+            return _from_cluster({**hit, "id": rep_id}, post)
     return None
 
 
+def _set_cluster_result(dedup, cluster: str, post: Dict[str, Any], res: Dict[str, Any] | None):
+    cache = result_cache()
+    if res and cache is not None:
+        content = content_hash(post.get("text") or "", record_html(post))
+        dedup.set_result_ref(cluster, content, post.get("id"))
+        cache.pin([ResultCache.key(content, MODEL, prompt_version(batch), SAMPLING)
+                   for batch in (False, True)])
+
+
+def _from_cluster(known: Dict[str, Any], post: Dict[str, Any]) -> Dict[str, Any]:
+    res = {**known, "id": post.get("id"), "tab": post.get("tab")}
+    if str(known.get("id")) != str(post.get("id")):
+        res["dup_of"] = known.get("dup_of") or known.get("id")
+    return res
+
+
 # -------------------------------------------------------
-# Summarize entire tab
+# Batched prompts: many short posts per request
 # -------------------------------------------------------
-def summarize_tab(job_dir: Path, tab: str, limit: int | None):
-    
+_CJK = re.compile(r"[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count without a tokenizer: ~1 per CJK char, ~4 chars per token otherwise."""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def pack_batches(posts: List[Dict[str, Any]], max_prompt_tokens: int,
+                 max_posts: int) -> List[List[Dict[str, Any]]]:
+    """Split posts, in order, into batches whose prompt stays under max_prompt_tokens.
+
+    A post too long to share a request goes alone (and is sent with build_prompt).
+    """
+    overhead = estimate_tokens(build_batch_prompt([]))
+    batches: List[List[Dict[str, Any]]] = []
+    cur: List[Dict[str, Any]] = []
+    used = overhead
+    for post in posts:
+        cost = estimate_tokens(build_batch_prompt([post])) - overhead
+        if cur and (used + cost > max_prompt_tokens or len(cur) >= max_posts):
+            batches.append(cur)
+            cur, used = [], overhead
+        cur.append(post)
+        used += cost
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+def _parse_batch(posts: List[Dict[str, Any]], raw_output: str) -> Dict[str, Dict[str, Any]]:
+    """{str(id): result} for every well-formed item of a batch answer (may be partial)."""
+    start, end = raw_output.find("["), raw_output.rfind("]")
+    try:
+        items = json.loads(raw_output[start:end + 1]) if start >= 0 else None
+    except json.JSONDecodeError:
+        items = None
+    if not isinstance(items, list):
+        logger.error(f"Invalid batch JSON for posts {[p.get('id') for p in posts]}:\n{raw_output[:500]}")
+        return {}
+
+    by_id = {str(p.get("id")): p for p in posts}
+    out = {}
+    for item in items:
+        if not isinstance(item, dict) or "summary" not in item:
+            continue
+        post = by_id.get(str(item.get("id")))
+        if post is None:
+            continue
+        out[str(post.get("id"))] = {**item, "id": post.get("id"), "tab": post.get("tab")}
+    return out
+
+
+# -------------------------------------------------------
+# API key
+# -------------------------------------------------------
+def load_api_key() -> str:
     if os.path.exists(".env"):
         load_dotenv(".env")
     else:
@@ -129,33 +343,273 @@ def summarize_tab(job_dir: Path, tab: str, limit: int | None):
     api_key = os.getenv("FIREWORKS_API_KEY")
     if not api_key:
         raise RuntimeError("Missing FIREWORKS_API_KEY env variable")
+    return api_key
+
 
+# -------------------------------------------------------
+# Summarize entire tab
+# -------------------------------------------------------
+def _load_tab_posts(job_dir: Path, tab: str, limit: int | None) -> List[Dict[str, Any]] | None:
     raw_file = job_dir / "raw" / f"posts_{tab}.json"
-    if not raw_file.exists():
+    if not records_exist(raw_file):
         logger.warning(f"No raw posts for tab {tab}")
-        return
+        return None
 
-    with open(raw_file, "r", encoding="utf-8") as f:
-        posts: List[Dict[str, Any]] = json.load(f)
+    posts: List[Dict[str, Any]] = read_json_list(raw_file)
 
     if limit is not None:
         posts = posts[:limit]
+    return posts
 
-    print(f"\n Summarizing {len(posts)} posts from tab '{tab}'...\n")
 
+def _save_summaries(job_dir: Path, tab: str, results: List[Dict[str, Any]]):
     output_dir = job_dir / "summary"
     output_dir.mkdir(exist_ok=True)
 
     summary_path = output_dir / f"summary_{tab}.json"
 
+    # same format as the live tail / compaction write (segments by default)
+    replace_json_list(summary_path, results, unique_keys=("id", "tab"))
+
+    print(f"Saved summaries → {summary_path}")
+
+
+def summarize_tab(job_dir: Path, tab: str, limit: int | None, dedup=None) -> List[Dict[str, Any]]:
+    
+    api_key = load_api_key()
+
+    posts = _load_tab_posts(job_dir, tab, limit)
+    if posts is None:
+        return []
+
+    print(f"\n Summarizing {len(posts)} posts from tab '{tab}'...\n")
+
     results = []
+    reused = 0
     for post in tqdm(posts, desc=f"Summarizing [{tab}]", ncols=100):
-        res = summarize_one(post, api_key)
+        res, was_reused = summarize_clustered(post, api_key, dedup, job_dir.name)
         if res:
             results.append(res)
+        if was_reused:
+            reused += 1
+            continue
         time.sleep(0.5)   # avoid 429 rate limit
+    if dedup is not None:
+        print(f"Near-duplicates: {reused}/{len(posts)} summaries reused from their cluster")
+    log_cache_stats()
 
-    with open(summary_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    _save_summaries(job_dir, tab, results)
+    return results
 
-    print(f"Saved summaries → {summary_path}")
+
+# -------------------------------------------------------
+# Async: many posts in flight over one keep-alive connection pool
+# -------------------------------------------------------
+class AsyncSummarizer:
+    """Concurrent summarize_one / summarize_clustered over a pooled httpx client.
+
+    At most `concurrency` requests are in flight; connections are kept alive
+    and reused, so each call costs one round trip instead of a TLS handshake
+    plus the fixed 0.5s sleep of the sequential path. Retries, backoff and the
+    JSON handling are the same as summarize_one. Near-duplicates of a post that
+    is still being summarized wait for its result instead of calling the API.
+    summarize_many packs short posts into batched requests (build_batch_prompt).
+    """
+
+    def __init__(self, api_key: str, concurrency: int = DEFAULT_SUMMARIZE_CONCURRENCY,
+                 url: str | None = None, timeout: float = 120.0):
+        self.api_key = api_key
+        self.url = url or FIREWORKS_URL
+        self.sem = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self._cluster_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.requests = 0        # batch requests sent
+        self.batched = 0         # posts answered by a batch
+        self.fallbacks = 0       # posts re-sent alone after a malformed / incomplete batch
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def chat(self, prompt: str, **sampling) -> str:
+        payload, headers = _chat_request(prompt, self.api_key, **sampling)
+        async with self.sem:
+            response = await self.client.post(self.url, headers=headers, content=json.dumps(payload))
+
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"Fireworks API error {response.status_code}: {response.text}"
+            )
+
+        data = response.json()
+        return data["choices"][0]["message"]["content"]
+
+    async def summarize_one(self, post: Dict[str, Any], retries: int = 5) -> Dict[str, Any] | None:
+        if isinstance(post, str):
+            logger.error(f"Post is string, not JSON: {post[:20]}")
+            return None
+
+        key, hit = _cache_lookup(post)
+        if hit is not None:
+            return hit
+
+        prompt = build_prompt(post)
+
+        for attempt in range(1, retries + 1):
+            try:
+                raw_output = await self.chat(prompt)
+                parsed = _parse_result(post, raw_output)
+                _cache_store(key, parsed)
+                return parsed
+
+            except Exception as e:
+                await asyncio.sleep(_retry_delay(post, attempt, e))
+
+        logger.error(f"FAILED after {retries} retries → post {post.get('id')}")
+        return None
+
+    async def summarize_clustered(self, post: Dict[str, Any], dedup=None,
+                                  job: str | None = None) -> Tuple[Dict[str, Any] | None, bool]:
+        if dedup is None:
+            return await self.summarize_one(post), False
+        cluster = dedup.assign(job, post)
+        async with self._cluster_locks[cluster]:
+            known = _cluster_result(dedup, cluster, post)
+            if known:
+                return known, True
+            res = await self.summarize_one(post)
+            _set_cluster_result(dedup, cluster, post, res)
+            return res, False
+
+    async def _send_batch(self, todo: List[Tuple[Dict[str, Any], str | None]],
+                          retries: int = 5) -> Dict[str, Dict[str, Any] | None]:
+        posts = [p for p, _ in todo]
+        if len(posts) == 1:
+            return {str(posts[0].get("id")): await self.summarize_one(posts[0])}
+
+        got: Dict[str, Dict[str, Any] | None] = {}
+        prompt = build_batch_prompt(posts)
+        max_tokens = SUMMARY_BATCH["output_tokens_per_post"] * len(posts) + SAMPLING["max_tokens"]
+        for attempt in range(1, retries + 1):
+            try:
+                self.requests += 1
+                raw_output = await self.chat(prompt, max_tokens=max_tokens)
+                got = _parse_batch(posts, raw_output)
+                break
+
+            except Exception as e:
+                await asyncio.sleep(_retry_delay(posts[0], attempt, e))
+
+        for p, key in todo:
+            _cache_store(key, got.get(str(p.get("id"))), batch=True)
+        missing = [p for p in posts if str(p.get("id")) not in got]
+        self.batched += len(posts) - len(missing)
+        if missing:
+            logger.warning(f"Batch of {len(posts)}: {len(missing)} posts missing or malformed, "
+                           f"summarizing them one by one")
+            self.fallbacks += len(missing)
+            singles = await asyncio.gather(*(self.summarize_one(p) for p in missing))
+            got.update({str(p.get("id")): r for p, r in zip(missing, singles)})
+        return got
+
+    async def summarize_many(self, posts: List[Dict[str, Any]], dedup=None, job: str | None = None,
+                             max_prompt_tokens: int = SUMMARY_BATCH["max_prompt_tokens"],
+                             max_posts: int = SUMMARY_BATCH["max_posts"]
+                             ) -> List[Tuple[Dict[str, Any] | None, bool]]:
+        """summarize_clustered for a whole tab, packing one post per cluster into batches."""
+        out: List[Dict[str, Any] | None] = [None] * len(posts)
+        reused = [False] * len(posts)
+        reps: Dict[str, int] = {}            # cluster -> index of the post sent for it
+        followers: List[Tuple[int, str]] = []
+        pending: List[int] = []
+        for i, post in enumerate(posts):
+            if dedup is None:
+                pending.append(i)
+                continue
+            cluster = dedup.assign(job, post)
+            known = _cluster_result(dedup, cluster, post)
+            if known:
+                out[i], reused[i] = known, True
+            elif cluster in reps:
+                followers.append((i, cluster))
+            else:
+                reps[cluster] = i
+                pending.append(i)
+
+        # cached posts first, so only the rest is packed into requests
+        todo = []
+        for i in pending:
+            key, hit = _cache_lookup(posts[i], batch=True)
+            if hit is not None:
+                out[i] = hit
+            else:
+                todo.append((posts[i], key))
+        keys = {id(p): key for p, key in todo}
+        batches = pack_batches([p for p, _ in todo], max_prompt_tokens, max_posts)
+        got: Dict[str, Dict[str, Any] | None] = {}
+        for res in await asyncio.gather(*(self._send_batch([(p, keys[id(p)]) for p in b]) for b in batches)):
+            got.update(res)
+        for i in pending:
+            if out[i] is None:
+                out[i] = got.get(str(posts[i].get("id")))
+        for cluster, i in reps.items():
+            _set_cluster_result(dedup, cluster, posts[i], out[i])
+        for i, cluster in followers:
+            rep = out[reps[cluster]]
+            if rep:
+                out[i], reused[i] = _from_cluster(rep, posts[i]), True
+        return list(zip(out, reused))
+
+
+async def summarize_tabs_async(job_dir: Path, tabs: List[str], limit: int | None, dedup=None,
+                               concurrency: int = DEFAULT_SUMMARIZE_CONCURRENCY,
+                               api_key: str | None = None,
+                               url: str | None = None,
+                               batch: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    """summarize_tab for all `tabs` at once, sharing one client and one concurrency limit.
+
+    With `batch`, posts of the SUMMARY_BATCH tabs are packed several per request.
+    Each tab's summaries keep the order of its raw posts; returns {tab: results}.
+    """
+    api_key = api_key or load_api_key()
+    tab_posts = {tab: _load_tab_posts(job_dir, tab, limit) for tab in tabs}
+    tab_posts = {tab: posts for tab, posts in tab_posts.items() if posts is not None}
+    total = sum(len(p) for p in tab_posts.values())
+    print(f"\n Summarizing {total} posts from {len(tab_posts)} tabs, {concurrency} at a time...\n")
+
+    reused = 0
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    async with AsyncSummarizer(api_key, concurrency=concurrency, url=url) as summarizer:
+        with tqdm(total=total, desc="Summarizing", ncols=100) as bar:
+            async def one(post):
+                res = await summarizer.summarize_clustered(post, dedup, job_dir.name)
+                bar.update(1)
+                return res
+
+            async def many(posts):
+                res = await summarizer.summarize_many(posts, dedup, job_dir.name)
+                bar.update(len(posts))
+                return res
+
+            done = await asyncio.gather(*(
+                many(posts) if batch and tab in SUMMARY_BATCH["tabs"] else asyncio.gather(*(one(p) for p in posts))
+                for tab, posts in tab_posts.items()))
+    for tab, results in zip(tab_posts, done):
+        out[tab] = [r for r, _ in results if r]
+        reused += sum(was_reused for _, was_reused in results)
+        _save_summaries(job_dir, tab, out[tab])
+    if dedup is not None:
+        print(f"Near-duplicates: {reused}/{total} summaries reused from their cluster")
+    if batch:
+        logger.info(f"Batching: {summarizer.batched} posts answered by {summarizer.requests} batch requests, "
+                    f"{summarizer.fallbacks} re-sent one by one")
+    log_cache_stats()
+    return out
@@ -4,10 +4,20 @@ import json
 import logging
 from pathlib import Path
 import yaml
-from config import STORAGE_ROOT, default_jobname, TABS, DEFAULT_SCROLL_ROUNDS
+from config import (STORAGE_ROOT, SEEN_INDEX_ROOT, default_jobname, TABS, DEFAULT_SCROLL_ROUNDS,
+                    DEFAULT_FETCH_CONCURRENCY, DEFAULT_PARSE_WORKERS, DEFAULT_TAB_PARALLELISM, ARCHIVE_ROOT,
+                    DEFAULT_SUMMARIZE_CONCURRENCY, POST_STORE_PATH, COLUMNAR_ROOT, NEAR_DUP_ROOT, LLM_CACHE)
 from crawler.browser_crawler import XueqiuBrowserCrawler
-from llm.summarizer import summarize_tab
+from crawler.seen_index import SeenIndex
+from crawler.sharding import crawl_sharded
+from crawler.live_tail import LiveTail
+from datastore.catalog import JobCatalog
+from datastore.columnar import ColumnarExport
+from datastore.near_dup import NearDupIndex
+from datastore.post_store import PostStore
+from llm.summarizer import summarize_tabs_async, load_api_key
 from reporting.report_generator import generate_report
+from utils import read_json_list
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,13 +32,34 @@ def load_config():
         return yaml.safe_load(f)
 
 async def run(args):
+    # post_store: true -> every stage also writes to / reads from storage/_index/posts.sqlite3
+    store = PostStore(POST_STORE_PATH) if args.get("post_store") else None
+    # near_dup: true -> one LLM call per cluster of near-identical posts (across tabs and jobs);
+    # cluster summaries are resolved through the LLM result cache
+    if args.get("near_dup", True) and not LLM_CACHE["enabled"]:
+        raise ValueError("near_dup reuses summaries through the LLM cache: enable LLM_CACHE or set near_dup: false")
+    dedup = NearDupIndex(NEAR_DUP_ROOT) if args.get("near_dup", True) else None
+    try:
+        await _run(args, store, dedup)
+    finally:
+        if store:
+            store.close()
+        if dedup:
+            dedup.close()
+
+async def _run(args, store, dedup):
     if args["job"] == "default":
+        if args.get("resume"):
+            logger.warning("resume needs an existing job name; starting a new job instead")
+            args["resume"] = False
         args["job"] = default_jobname()
     job_dir = STORAGE_ROOT / args["job"]
     raw_dir = job_dir / "raw"
     raw_dir.mkdir(parents=True, exist_ok=True)
     
     logger.info(f"Running job: {job_dir}")
+    # storage/<job>/manifest.json + storage/_index/catalog.json, refreshed after each stage
+    catalog = JobCatalog()
     for elem in args:
         logger.info(f"{elem}: {args[elem]}")
         
@@ -49,21 +80,83 @@ async def run(args):
         tab_keys = [v for (k, v) in TABS.items()]
 
     if args["mode"] in ("crawl", "all"):
+        catalog.set_stage(job_dir, "crawl", "running")
         logger.info("[1/3] Start crawling...")
         logger.info(f"Tabs to crawl: {[k for (k, _) in tab_keys]}") 
-        crawler = XueqiuBrowserCrawler(raw_dir, scroll_rounds=args["scroll"])
-        await crawler.crawl(tab_keys)
+        seen_mode = args.get("seen_index", "off")
+        crawler_kwargs = {
+            "concurrency": args.get("concurrency", DEFAULT_FETCH_CONCURRENCY),
+            "tab_options": args.get("tab_options"),
+            "seen_mode": seen_mode,
+            "parse_workers": args.get("parse_workers", DEFAULT_PARSE_WORKERS),
+            "tab_parallelism": args.get("tab_pages", DEFAULT_TAB_PARALLELISM),
+            "resume": bool(args.get("resume", False)),
+            "rate_limit": args.get("rate_limit"),
+        }
+        archive = args.get("archive") or {}
+        if archive.get("mode") not in (None, False, "off"):
+            if args.get("workers", 1) > 1:
+                raise ValueError("archive record/replay runs with workers: 1 (one browser, one archive)")
+            crawler_kwargs["archive_mode"] = archive["mode"]
+            crawler_kwargs["archive_path"] = Path(archive.get("path") or ARCHIVE_ROOT / f"{args['job']}.har.zip")
+        workers = args.get("workers", 1)
+        if workers > 1:
+            # one browser per worker process; shard outputs merged into raw/posts_{tab}.json
+            tab_stats = await asyncio.to_thread(
+                crawl_sharded, raw_dir, tab_keys, workers, args["scroll"], crawler_kwargs)
+        else:
+            seen_index = SeenIndex(SEEN_INDEX_ROOT) if seen_mode in ("skip", "copy") else None
+            crawler = XueqiuBrowserCrawler(raw_dir, scroll_rounds=args["scroll"],
+                                           seen_index=seen_index, **crawler_kwargs)
+            try:
+                await crawler.crawl(tab_keys)
+            finally:
+                if seen_index:
+                    seen_index.close()
+            tab_stats = crawler.tab_stats
+        for k, st in tab_stats.items():
+            logger.info(f"[{k}] throughput: {st}")
+        if store:
+            n = sum(store.add_posts(args["job"], read_json_list(raw_dir / f"posts_{k}.json")) for k, _ in tab_keys)
+            logger.info(f"Post store: {n} posts for {args['job']}")
+        catalog.set_stage(job_dir, "crawl", "done", rescan=True)
         logger.info("[1/3] Crawling Done.")
 
+    if args["mode"] == "tail":
+        # long-running: follow 7x24 and append only new rows to this job
+        tail_opts = args.get("tail") or {}
+        api_key = load_api_key() if tail_opts.get("summarize", True) else None
+        crawler = XueqiuBrowserCrawler(raw_dir, tab_options=args.get("tab_options"),
+                                       rate_limit=args.get("rate_limit"))
+        await crawler.live_tail(LiveTail(job_dir, options=tail_opts, api_key=api_key,
+                                         store=store, dedup=dedup))
+        return
+
     if args["mode"] in ("summarize", "all"):
+        catalog.set_stage(job_dir, "summarize", "running")
         logger.info("[2/3] Start summarizing...")
-        for k,_  in tab_keys:
-            summarize_tab(job_dir, k, args["sum_limit"])
+        # all tabs at once, sum_concurrency requests in flight; sum_batch packs short posts per request
+        tab_results = await summarize_tabs_async(
+            job_dir, [k for k, _ in tab_keys], args["sum_limit"], dedup=dedup,
+            concurrency=args.get("sum_concurrency", DEFAULT_SUMMARIZE_CONCURRENCY),
+            batch=bool(args.get("sum_batch", False)))
+        for results in tab_results.values():
+            if store and results:
+                store.add_summaries(args["job"], results)
+        catalog.set_stage(job_dir, "summarize", "done", rescan=True)
         logger.info("[2/3] Summarizing Done.")
 
+    columnar = ColumnarExport(COLUMNAR_ROOT) if args.get("columnar") or args["mode"] == "export" else None
+    if columnar and args["mode"] in ("export", "all"):
+        logger.info("[export] Writing Parquet partitions...")
+        counts = columnar.export_job(job_dir, args["job"])
+        catalog.set_stage(job_dir, "export", "done")
+        logger.info(f"[export] {counts} -> {COLUMNAR_ROOT}")
+
     if args["mode"] in ("report", "all"):
         logger.info("[3/3] Generating report...")
-        p = generate_report(job_dir, args["job"])
+        p = generate_report(job_dir, args["job"], store=store, columnar=columnar)
+        catalog.set_stage(job_dir, "report", "done", rescan=True)
         logger.info(f"[3/3] Report saved at: {p}")
 
 
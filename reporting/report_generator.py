@@ -1,8 +1,9 @@
-import json
 from pathlib import Path
 from collections import defaultdict, Counter
 import datetime
 
+from utils import list_record_files, read_json_list
+
 ## Helper functions ##
 def _safe_ts(raw_post):
     ts_fields = ["timestamp", "created_at", "ts"]
@@ -25,28 +26,44 @@ def _safe_ts(raw_post):
 
 
 
-def generate_report(job_dir: Path, job_name: str) -> str:
+# raw fields the report reads (columnar source: html and other heavy columns are never decoded)
+REPORT_POST_COLUMNS = ["id", "tab", "text", "symbols", "url", "timestamp", "post_time", "extra"]
+
+
+def generate_report(job_dir: Path, job_name: str, store=None, columnar=None) -> str:
     summary_dir = job_dir / "summary"
     raw_dir = job_dir / "raw"
     report_dir = job_dir / "reports"
     report_dir.mkdir(exist_ok=True)
 
-
-    # ---------- Load summaries ----------
     all_summaries = []
-    for f in summary_dir.glob("*.json"):
-        try:
-            all_summaries.extend(json.loads(f.read_text(encoding="utf-8")))
-        except Exception:
-            continue
-
-    # ---------- Load raw ----------
     all_raw = []
-    for f in raw_dir.glob("*.json"):
-        try:
-            all_raw.extend(json.loads(f.read_text(encoding="utf-8")))
-        except Exception:
-            continue
+    if store is not None:
+        # ---------- Load from the post store (only summarized posts, no html) ----------
+        all_summaries = list(store.summaries(job=job_name))
+        if all_summaries:
+            all_raw = list(store.summarized_posts(job_name))
+
+    if not all_summaries and columnar is not None and columnar.has_job(job_name):
+        # ---------- Load from the Parquet export (projected columns only) ----------
+        all_summaries = columnar.read_records("summaries", jobs=[job_name])
+        ids = [s["id"] for s in all_summaries]
+        all_raw = columnar.read_records("posts", REPORT_POST_COLUMNS, jobs=[job_name], ids=ids)
+
+    if not all_summaries:
+        # ---------- Load summaries ----------
+        for f in list_record_files(summary_dir):
+            try:
+                all_summaries.extend(read_json_list(f))
+            except Exception:
+                continue
+
+        # ---------- Load raw ----------
+        for f in list_record_files(raw_dir):
+            try:
+                all_raw.extend(read_json_list(f))
+            except Exception:
+                continue
 
     # If no summaries → minimal report
     if not all_summaries:
@@ -0,0 +1,153 @@
+# tickers.py
+#
+# Single-pass ticker detection: the code patterns from config.TICKER_PATTERNS,
+# Xueqiu cashtags ($贵州茅台(SH600519)$, $苹果(AAPL)$, $比亚迪$) and company
+# names from a dictionary are compiled into ONE regex, so each text is scanned
+# once. Names are folded into a prefix trie before compiling, which keeps the
+# alternation cheap even for thousands of names, and the whole pattern is
+# guarded by a one-character lookahead of every possible first character, so
+# positions that cannot start a match (most of a Chinese post) cost a single
+# set lookup. Code patterns must therefore start with an ASCII letter or digit.
+# Every hit is mapped to a canonical code: SH600519 / SZ000001 / BJ830799 /
+# HK00700 / AAPL.
+
+import bisect
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from config import TICKER_PATTERNS, TICKER_DICT_PATH
+
+logger = logging.getLogger("tickers")
+
+# $name(code)$, or $name$ where the name has no whitespace and does not start
+# with a digit: otherwise "price $15 SH600519 now $3" would be read as one
+# unresolvable cashtag and hide the code between the dollar signs
+_CASHTAG = (r"\$(?:(?P<cashname>[^$()\x00\n]{1,24}?)"
+            r"[(（](?P<cashcode>[A-Za-z]{0,2}\d{4,6}(?:\.[A-Za-z]{2})?|[A-Za-z]{1,5}(?:\.[A-Za-z]{1,2})?)[)）]"
+            r"|(?P<cashonly>[^$()\x00\s\d][^$()\x00\s]{0,23}?))\$")
+_SEP = "\x00"   # joins texts in detect_many; no pattern can match across it
+
+
+def canonical(code: str) -> Optional[str]:
+    """Normalize a ticker spelling to its canonical code (None if it is not one)."""
+    c = code.strip().upper()
+    m = re.fullmatch(r"(\d{4,6})\.(SH|SZ|BJ|HK)", c)
+    if m:
+        digits, ex = m.groups()
+        return "HK" + digits.zfill(5) if ex == "HK" else ex + digits
+    m = re.fullmatch(r"(SH|SZ|BJ|HK)(\d{4,6})", c)
+    if m:
+        ex, digits = m.groups()
+        return "HK" + digits.zfill(5) if ex == "HK" else ex + digits
+    if re.fullmatch(r"\d{6}", c):
+        # bare A-share code: exchange follows from the leading digit
+        ex = "SH" if c[0] in "569" else "BJ" if c[0] in "48" else "SZ"
+        return ex + c
+    if re.fullmatch(r"\d{4,5}", c):
+        return "HK" + c.zfill(5)
+    if re.fullmatch(r"[A-Z]{1,5}(\.[A-Z]{1,2})?", c):
+        return c
+    return None
+
+
+def load_dictionary(path: Path) -> Dict[str, str]:
+    """name<TAB>code per line ('#' comments); codes are canonicalized."""
+    names: Dict[str, str] = {}
+    if not path.exists():
+        return names
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split("\t") if "\t" in line else line.split()
+        if len(parts) < 2:
+            continue
+        code = canonical(parts[1])
+        if code:
+            names[parts[0].strip()] = code
+        else:
+            logger.warning(f"{path}: not a ticker code {parts[1]!r}")
+    return names
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Alternation of literal words as a prefix trie: 贵州茅台|贵州燃气 -> 贵州(?:茅台|燃气)."""
+    trie: Dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node: Dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        # longest match first: optional end goes after the branches
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            body = "(?:" + body + ")?"
+        return body
+
+    return emit(trie)
+
+
+class TickerMatcher:
+    """One compiled pattern for cashtags, code patterns and dictionary names."""
+
+    def __init__(self, names: Optional[Dict[str, str]] = None, patterns: Sequence[str] = TICKER_PATTERNS):
+        self.names = dict(names or {})
+        alts = [f"(?P<cash>{_CASHTAG})"]
+        alts += [f"(?P<code{i}>{p})" for i, p in enumerate(patterns)]
+        first = "$A-Za-z0-9"
+        if self.names:
+            alts.append(f"(?P<name>{_trie_regex(self.names)})")
+            first += "".join(sorted({re.escape(n[0]) for n in self.names}))
+        self.regex = re.compile(f"(?=[{first}])(?:{'|'.join(alts)})")
+
+    def _code(self, m: re.Match) -> Optional[str]:
+        kind = m.lastgroup
+        if kind == "cash":
+            if m.group("cashcode"):
+                return canonical(m.group("cashcode"))
+            name = m.group("cashonly")
+            return self.names.get(name) or canonical(name)
+        if kind == "name":
+            return self.names[m.group()]
+        return canonical(m.group()) or m.group().upper()
+
+    def detect(self, text: str) -> List[str]:
+        codes = set()
+        for m in self.regex.finditer(text or ""):
+            c = self._code(m)
+            if c:
+                codes.add(c)
+        return sorted(codes)
+
+    def detect_many(self, texts: Sequence[str]) -> List[List[str]]:
+        """detect() for many texts with a single scan over them joined together."""
+        texts = [(t or "").replace(_SEP, " ") for t in texts]
+        starts, pos = [], 0
+        for t in texts:
+            starts.append(pos)
+            pos += len(t) + 1
+        out: List[set] = [set() for _ in texts]
+        for m in self.regex.finditer(_SEP.join(texts)):
+            c = self._code(m)
+            if c:
+                out[bisect.bisect_right(starts, m.start()) - 1].add(c)
+        return [sorted(s) for s in out]
+
+
+_default: Optional[TickerMatcher] = None
+
+
+def default_matcher() -> TickerMatcher:
+    """Matcher over TICKER_PATTERNS + the TICKER_DICT_PATH dictionary (built once per process)."""
+    global _default
+    if _default is None:
+        _default = TickerMatcher(load_dictionary(TICKER_DICT_PATH))
+    return _default
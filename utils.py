@@ -1,9 +1,11 @@
-import re
 import orjson
 import logging
+import shutil
 from pathlib import Path
 from typing import Any, Dict, List
-from config import TICKER_PATTERNS
+from config import STORAGE_FORMAT
+from datastore.segments import SegmentStore, segment_dir
+from tickers import default_matcher
 
 logger = logging.getLogger("utils")
 
@@ -11,6 +13,9 @@ def ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
 
 def read_json_list(path: Path) -> List[Dict[str, Any]]:
+    """Read a record list; `path` may be a JSON array file or have a segmented store (path.seg/)."""
+    if segment_dir(path).is_dir():
+        return SegmentStore(segment_dir(path)).read_all()
     if not path.exists():
         return []
     raw = path.read_bytes()
@@ -32,8 +37,38 @@ def read_json_list(path: Path) -> List[Dict[str, Any]]:
         logger.error(f"Corrupt JSON root: {type(data)}; returning []")
     return out
 
+def records_exist(path: Path) -> bool:
+    return path.exists() or segment_dir(path).is_dir()
+
+def list_record_files(directory: Path, pattern: str = "*") -> List[Path]:
+    """Logical record paths (name.json) in a directory, whether stored as JSON or segments."""
+    found = {p for p in directory.glob(pattern + ".json")}
+    found |= {p.with_suffix(".json") for p in directory.glob(pattern + ".seg") if p.is_dir()}
+    return sorted(found)
+
+# one store per (path, keys) so the key index is loaded once per process
+_STORES: Dict[Any, SegmentStore] = {}
+
+def _segment_store(path: Path, unique_keys) -> SegmentStore:
+    k = (str(path.resolve()), tuple(unique_keys))
+    if k not in _STORES:
+        store = SegmentStore(segment_dir(path), unique_keys)
+        if path.exists() and not store.manifest["segments"]:
+            # one-time migration of an existing JSON array file
+            store.append(read_json_list(path))
+            path.unlink()
+            logger.info(f"Migrated {path} -> {store.root}")
+        _STORES[k] = store
+    return _STORES[k]
+
 def append_unique_json(path: Path, new_items: List[Dict[str, Any]], unique_keys=("id","tab","text_hash")):
-    """Append and dedupe by keys. Creates file if missing."""
+    """Append and dedupe by keys. Creates file if missing.
+
+    With STORAGE_FORMAT "segments" (default) only the new records are written,
+    to path.seg/ (see datastore/segments.py); "json" rewrites the whole array.
+    """
+    if STORAGE_FORMAT == "segments":
+        return _segment_store(path, unique_keys).append(new_items)
     existing = read_json_list(path)
     # map key tuple to index
     def key(d: Dict[str, Any]):
@@ -49,12 +84,23 @@ def append_unique_json(path: Path, new_items: List[Dict[str, Any]], unique_keys=
     path.write_bytes(orjson.dumps(existing, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS))
     return added, len(existing)
 
+def replace_json_list(path: Path, items: List[Dict[str, Any]], unique_keys=("id","tab","text_hash")):
+    """Replace the record list at `path` (JSON file and/or path.seg/) with `items`,
+    written in the configured STORAGE_FORMAT like append_unique_json."""
+    resolved = str(path.resolve())
+    for k in [k for k in _STORES if k[0] == resolved]:
+        del _STORES[k]
+    if segment_dir(path).is_dir():
+        shutil.rmtree(segment_dir(path))
+    path.unlink(missing_ok=True)
+    return append_unique_json(path, items, unique_keys=unique_keys)
+
 def save_json_list(path: Path, data: List[Dict[str, Any]]):
     path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS))
 
 def detect_symbols(text: str) -> List[str]:
-    syms = set()
-    for pat in TICKER_PATTERNS:
-        for m in re.findall(pat, text or ""):
-            syms.add(m.upper())
-    return sorted(syms)
+    """Canonical ticker codes in `text` (codes, cashtags and dictionary names; see tickers.py)."""
+    return default_matcher().detect(text)
+
+def detect_symbols_many(texts: List[str]) -> List[List[str]]:
+    return default_matcher().detect_many(texts)